@@ -0,0 +1,187 @@
+"""
+Action Macros - Record a successful agent run once, replay it without the model
+Repeat navigations (Spotlight → type URL → return → click "Products" → click
+"What's New") cost a dozen model round trips every time. While agent_loop runs,
+the executed tool calls are recorded; every screenshot the model asked for
+becomes a checkpoint (a small grayscale thumbnail). Later runs replay the
+actions locally and, at each checkpoint, wait until the screen looks like it did
+during the recording. The first checkpoint that never matches (or action that
+errors) hands control back to the model from the current state.
+"""
+
+import os
+import json
+import time
+import base64
+import threading
+from io import BytesIO
+from PIL import Image
+import config
+from screen_capture import screen_capture
+from screen_waiter import screen_waiter
+
+
+# Observation-only or run-specific actions that are never replayed
+SKIPPED_ACTIONS = {"screenshot", "capture_html"}
+ERROR_PREFIXES = ("Error", "Failed", "Unknown action", "Permission error", "Missing")
+
+
+def _is_error(result):
+    # Plain text results, or the leading text block of composite (batch) results
+    if isinstance(result, list):
+        result = next((part.get("text", "") for part in result if part.get("type") == "text"), "")
+    return isinstance(result, str) and result.startswith(ERROR_PREFIXES)
+
+
+def _encode_thumbnail(image):
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _decode_thumbnail(data):
+    return Image.open(BytesIO(base64.b64decode(data))).convert('L')
+
+
+class MacroRecorder:
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])  # Replayed prefix (if any) is kept when the model takes over
+
+    def record(self, tool_input, result):
+        """Record one executed tool call; screenshots become checkpoints, failed actions are dropped"""
+        action = tool_input.get("action")
+        if action == "screenshot":
+            if not any("action" in step for step in self.steps):
+                return  # The desktop before the first action differs from run to run
+            if not isinstance(result, str) or len(result) <= 100:
+                return
+            frame = Image.open(BytesIO(base64.b64decode(result))).convert('L')
+            height = max(1, round(frame.height * config.WAIT_THUMB_WIDTH / frame.width))
+            checkpoint = {"checkpoint": _encode_thumbnail(frame.resize((config.WAIT_THUMB_WIDTH, height), Image.BILINEAR))}
+            if self.steps and "checkpoint" in self.steps[-1]:
+                self.steps[-1] = checkpoint  # Only the latest of back-to-back screenshots matters
+            else:
+                self.steps.append(checkpoint)
+            return
+        if action in SKIPPED_ACTIONS or _is_error(result):
+            return
+        if isinstance(result, list):
+            # Batch ending in a screenshot: replay the steps, keep the screenshot as the checkpoint
+            steps = [step for step in tool_input.get("steps", []) if step.get("action") != "screenshot"]
+            self.steps.append({"action": {**tool_input, "steps": steps, "screenshot": False}})
+            image = next((part for part in result if part.get("type") == "image"), None)
+            if image is not None:
+                self.record({"action": "screenshot"}, image["source"]["data"])
+            return
+        self.steps.append({"action": dict(tool_input)})
+
+    def finish(self):
+        return {
+            "steps": self.steps,
+            "screen": [screen_capture.target_width, screen_capture.target_height],
+            "recorded_at": time.time()
+        }
+
+
+class MacroPlayer:
+    def __init__(self, threshold=None, checkpoint_timeout=None):
+        self.threshold = threshold or config.MACRO_CHECKPOINT_THRESHOLD
+        self.checkpoint_timeout = checkpoint_timeout or config.MACRO_CHECKPOINT_TIMEOUT
+
+    def _checkpoint_matches(self, reference, grab):
+        # Poll until the screen looks like the recording (pages take a moment to load)
+        deadline = time.perf_counter() + self.checkpoint_timeout
+        while True:
+            current = screen_waiter.thumbnail(grab=grab).resize(reference.size, Image.BILINEAR)
+            difference = screen_waiter.diff(reference, current)
+            if difference <= self.threshold:
+                return True, difference
+            if time.perf_counter() >= deadline:
+                return False, difference
+            time.sleep(config.WAIT_POLL_INTERVAL)
+
+    def replay(self, macro, agent, recorder=None):
+        """
+        Replay macro steps through agent.execute_computer_tool until the end or the first divergence
+        Replayed steps are appended to recorder so a model continuation extends the same macro
+        Returns dict: completed, steps_done, total_steps, diverged_at, reason, elapsed
+        """
+        start_time = time.perf_counter()
+        steps = macro["steps"]
+        outcome = {"completed": False, "steps_done": 0, "total_steps": len(steps), "diverged_at": None, "reason": None}
+        if macro.get("screen") != [screen_capture.target_width, screen_capture.target_height]:
+            outcome["reason"] = "recorded at a different screen size"
+        else:
+            for index, step in enumerate(steps):
+                if "action" in step:
+                    result = agent.execute_computer_tool(dict(step["action"]))
+                    if _is_error(result):
+                        outcome.update(diverged_at=index, reason=result)
+                        break
+                else:
+                    matched, difference = self._checkpoint_matches(_decode_thumbnail(step["checkpoint"]), agent._screen_grab())
+                    if not matched:
+                        outcome.update(diverged_at=index, reason=f"checkpoint differs by {difference:.1f}")
+                        break
+                if recorder is not None:
+                    recorder.steps.append(step)
+                outcome["steps_done"] = index + 1
+            else:
+                outcome["completed"] = True
+        outcome["elapsed"] = round(time.perf_counter() - start_time, 3)
+        status = "completed" if outcome["completed"] else f"diverged at step {outcome['diverged_at']} ({outcome['reason']})"
+        print(f"🎞️  Macro replay {status}: {outcome['steps_done']}/{len(steps)} steps in {outcome['elapsed']:.2f}s")
+        return outcome
+
+
+class MacroStore:
+    def __init__(self, store_file=None):
+        self.store_file = store_file or config.MACRO_STORE_FILE
+        self._macros = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._load()
+
+    def get(self, key):
+        with self._lock:
+            return self._macros.get(key)
+
+    def put(self, key, macro):
+        with self._lock:
+            self._macros[key] = macro
+        self.save()
+
+    def invalidate(self, key):
+        with self._lock:
+            removed = self._macros.pop(key, None)
+        if removed is not None:
+            self.save()
+
+    def stats(self):
+        with self._lock:
+            return {key: len(macro["steps"]) for key, macro in sorted(self._macros.items())}
+
+    def _load(self):
+        try:
+            with open(self.store_file, "r", encoding="utf-8") as fp:
+                self._macros = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+
+    def save(self):
+        tmp_path = f"{self.store_file}.tmp"
+        with self._write_lock:
+            with self._lock:
+                snapshot = dict(self._macros)
+            try:
+                os.makedirs(os.path.dirname(self.store_file), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as fp:
+                    json.dump(snapshot, fp)
+                os.replace(tmp_path, self.store_file)
+            except OSError as e:
+                print(f"⚠️  Failed to persist action macros: {e}")
+
+
+# Global instances for reuse
+macro_store = MacroStore()
+macro_player = MacroPlayer()
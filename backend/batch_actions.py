@@ -0,0 +1,127 @@
+"""
+Batch Actions - Validation for the composite "batch" computer action
+One tool_use normally carries one primitive action, so every step of a flow
+like "open Spotlight, type the URL, press Return, wait for the page" costs a
+full model round trip. A batch carries an ordered list of primitives that is
+checked completely before anything runs - an invalid script never half-executes
+- then runs back to back and returns one result, optionally ending with a
+screenshot:
+
+    {"action": "batch", "steps": [
+        {"action": "key", "key": "command+space"},
+        {"action": "type", "text": "traderjoes.com"},
+        {"action": "key", "key": "return"},
+        {"action": "wait_for_change", "mode": "load", "timeout": 5},
+        {"action": "screenshot"}
+    ]}
+"""
+
+import math
+import config
+from screen_capture import screen_capture
+
+
+CLICK_ACTIONS = {"left_click", "right_click", "double_click", "mouse_move"}
+BATCH_ACTIONS = {"key", "type", "scroll", "wait_for_change", "screenshot"} | CLICK_ACTIONS
+WAIT_MODES = {"change", "stable", "load"}
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch script is malformed; nothing in it has been executed"""
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _check_coordinate(index, coordinate, field="coordinate", edge=False):
+    # edge=True for the exclusive end corner of a region, which may sit on the right/bottom edge
+    if (not isinstance(coordinate, (list, tuple)) or len(coordinate) != 2
+            or not all(_is_number(value) for value in coordinate)):
+        raise BatchValidationError(f"step {index}: '{field}' must be [x, y]")
+    x, y = coordinate
+    width, height = screen_capture.target_width + edge, screen_capture.target_height + edge
+    if not (0 <= x < width and 0 <= y < height):
+        raise BatchValidationError(
+            f"step {index}: {field} {list(coordinate)} is outside the "
+            f"{screen_capture.target_width}x{screen_capture.target_height} screenshot"
+        )
+
+
+def _check_key(index, key):
+    # Same parsing as execute_computer_tool: "cmd+space" strings or a list of key names
+    keys = [part.strip() for part in key.split('+')] if isinstance(key, str) else key
+    if not isinstance(keys, list) or not keys or not all(isinstance(part, str) and part.strip() for part in keys):
+        raise BatchValidationError(f"step {index}: 'key' needs a key name like 'return' or 'command+space'")
+
+
+def _positive_number(index, value, field):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise BatchValidationError(f"step {index}: {field} must be a number")
+    if isinstance(value, bool) or not math.isfinite(number) or number <= 0:
+        raise BatchValidationError(f"step {index}: {field} must be a positive number")
+    return number
+
+
+def validate_batch(tool_input):
+    """
+    Check a batch tool input up front
+    Returns (steps without the trailing screenshot, final_screenshot: bool);
+    raises BatchValidationError describing the first problem found
+    """
+    steps = tool_input.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise BatchValidationError("'steps' must be a non-empty list of actions")
+    if len(steps) > config.BATCH_MAX_STEPS:
+        raise BatchValidationError(f"at most {config.BATCH_MAX_STEPS} steps per batch ({len(steps)} given)")
+
+    total_wait = 0.0
+    for index, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            raise BatchValidationError(f"step {index}: must be an object with an 'action'")
+        action = step.get("action")
+        if action not in BATCH_ACTIONS:
+            raise BatchValidationError(
+                f"step {index}: action '{action}' is not allowed in a batch (allowed: {', '.join(sorted(BATCH_ACTIONS))})"
+            )
+        if action == "screenshot" and index != len(steps):
+            raise BatchValidationError(f"step {index}: screenshot is only allowed as the last step")
+        if action == "key":
+            _check_key(index, step.get("key"))
+        if action == "type" and not isinstance(step.get("text"), str):
+            raise BatchValidationError(f"step {index}: 'type' needs a 'text' string")
+        if action in CLICK_ACTIONS:
+            _check_coordinate(index, step.get("coordinate"))
+        if action == "scroll":
+            if step.get("scroll_direction", "down") not in ("up", "down"):
+                raise BatchValidationError(f"step {index}: scroll_direction must be 'up' or 'down'")
+            # The executor runs int() on it, so only whole numbers (or digit strings) get through
+            amount = step.get("scroll_amount", 1)
+            whole = (isinstance(amount, int) and not isinstance(amount, bool)) or (
+                isinstance(amount, str) and amount.strip().isdigit())
+            if not whole or int(amount) <= 0:
+                raise BatchValidationError(f"step {index}: scroll_amount must be a positive whole number")
+            if "coordinate" in step:
+                _check_coordinate(index, step["coordinate"])
+        if action == "wait_for_change":
+            if step.get("mode", "change") not in WAIT_MODES:
+                raise BatchValidationError(f"step {index}: mode must be one of {', '.join(sorted(WAIT_MODES))}")
+            # The executor takes 'timeout', then the 'seconds' alias, then the default
+            field = "timeout" if step.get("timeout") else "seconds"
+            total_wait += _positive_number(index, step.get(field) or config.WAIT_DEFAULT_TIMEOUT, field)
+            region = step.get("region")
+            if region:
+                if not isinstance(region, (list, tuple)) or len(region) != 4:
+                    raise BatchValidationError(f"step {index}: region must be [x1, y1, x2, y2]")
+                _check_coordinate(index, region[:2], "region start")
+                _check_coordinate(index, region[2:], "region end", edge=True)
+                if not (region[0] < region[2] and region[1] < region[3]):
+                    raise BatchValidationError(f"step {index}: region {list(region)} must run from top-left to bottom-right")
+
+    if total_wait > config.BATCH_MAX_WAIT:
+        raise BatchValidationError(f"waits add up to {total_wait:.1f}s (limit {config.BATCH_MAX_WAIT:.0f}s)")
+
+    final_screenshot = steps[-1].get("action") == "screenshot" or bool(tool_input.get("screenshot"))
+    return [step for step in steps if step.get("action") != "screenshot"], final_screenshot
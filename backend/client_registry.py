@@ -0,0 +1,127 @@
+"""
+Client Registry - One pooled Anthropic client per process
+Every route used to build a WebsiteNavigatorAgent and with it a new Anthropic
+client, each owning a fresh httpx connection pool - so every request paid for
+new TCP/TLS handshakes. The registry keeps one keep-alive httpx pool (limits
+from config) per API key/base URL; agents borrow clients from it. Variants with
+different default headers (e.g. the computer-use beta header) are derived with
+with_options(), which shares the underlying HTTP client and its connections.
+"""
+
+import threading
+import httpx
+from anthropic import Anthropic, DefaultHttpxClient
+import config
+
+
+class ClientRegistry:
+    def __init__(self, max_connections=None, max_keepalive=None, keepalive_expiry=None, timeout=None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or config.ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive or config.ANTHROPIC_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry or config.ANTHROPIC_KEEPALIVE_EXPIRY
+        )
+        self.timeout = timeout or config.ANTHROPIC_TIMEOUT
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.borrowed = 0
+
+    def get(self, default_headers=None, api_key=None, base_url=None):
+        """Return the shared client for api_key/base_url, with default_headers applied"""
+        api_key = api_key or config.ANTHROPIC_API_KEY
+        headers_key = tuple(sorted((default_headers or {}).items()))
+        with self._lock:
+            self.borrowed += 1
+            base = self._clients.get((api_key, base_url, ()))
+            if base is None:
+                base = Anthropic(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=DefaultHttpxClient(limits=self.limits, timeout=self.timeout)
+                )
+                self._clients[(api_key, base_url, ())] = base
+                self.created += 1
+            if not headers_key:
+                return base
+            variant = self._clients.get((api_key, base_url, headers_key))
+            if variant is None:
+                variant = base.with_options(default_headers=dict(headers_key))
+                self._clients[(api_key, base_url, headers_key)] = variant
+            return variant
+
+    def close(self):
+        with self._lock:
+            bases = [client for (_, _, headers), client in self._clients.items() if not headers]
+            self._clients.clear()
+        for client in bases:
+            client.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pools": sum(1 for (_, _, headers) in self._clients if not headers),
+                "clients": len(self._clients),
+                "created": self.created,
+                "borrowed": self.borrowed,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections
+            }
+
+
+# Global instance for reuse
+client_registry = ClientRegistry()
+
+
+if __name__ == "__main__":
+    # Fresh client per request vs the shared registry against a local stub Messages API
+    import json
+    import time
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive
+        connections = 0
+
+        def setup(self):
+            super().setup()
+            StubHandler.connections += 1
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = json.dumps({
+                "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub",
+                "content": [{"type": "text", "text": "example.com"}], "stop_reason": "end_turn",
+                "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 1}
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    request = dict(model="stub", max_tokens=16, messages=[{"role": "user", "content": "go to example"}])
+    requests = 50
+
+    def fresh_client():
+        return Anthropic(api_key="stub", base_url=base_url)
+
+    def shared_client():
+        return client_registry.get({"anthropic-beta": "computer-use-2025-01-24"}, api_key="stub", base_url=base_url)
+
+    for label, borrow in (("new client per request", fresh_client), ("shared registry", shared_client)):
+        StubHandler.connections = 0
+        start_time = time.perf_counter()
+        for _ in range(requests):
+            borrow().messages.create(**request)
+        elapsed = (time.perf_counter() - start_time) / requests * 1000
+        print(f"🔌 {label}: {StubHandler.connections} connections for {requests} requests, {elapsed:.2f} ms/request")
+
+    client_registry.close()
+    server.shutdown()
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -14,18 +15,162 @@ if not ANTHROPIC_API_KEY:
 # Display settings - can be overridden by environment variables
 DISPLAY_WIDTH = int(os.getenv("DISPLAY_WIDTH", 3024))
 DISPLAY_HEIGHT = int(os.getenv("DISPLAY_HEIGHT", 1964))
+# Screen pixels per point: macOS region captures (screencapture -R) take points, so pixel
+# boxes are converted with this factor (2 on Retina displays, 1 on X11)
+DISPLAY_POINT_SCALE = float(os.getenv("DISPLAY_POINT_SCALE", 2 if sys.platform == "darwin" else 1))
+
+# Screenshot pipeline - frames are downscaled and re-encoded before being sent to the model
+SCREENSHOT_TARGET_WIDTH = int(os.getenv("SCREENSHOT_TARGET_WIDTH", 1280))
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "JPEG")  # PNG, JPEG or WEBP
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", 75))
+
+# Shared Anthropic HTTP connection pool (see client_registry.py)
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", 20))
+ANTHROPIC_MAX_KEEPALIVE = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE", 10))
+ANTHROPIC_KEEPALIVE_EXPIRY = 30.0  # Seconds an idle connection stays open for reuse
+ANTHROPIC_TIMEOUT = 600.0  # Same as the SDK default; computer use turns can be slow
 
 PYAUTOGUI_PAUSE = 0.01
 BETWEEN_ITERATIONS_SLEEP = 0.02
+# Stream agent_loop responses and start each tool call as soon as its input is complete
+AGENT_STREAMING = os.getenv("AGENT_STREAMING", "true").lower() == "true"
+# agent_loop history compaction - older screenshots become text placeholders
+HISTORY_KEEP_SCREENSHOTS = 2
+# Screenshots are compacted this many at a time, so the request prefix only changes every
+# few iterations and the prompt cache breakpoint on the history tail keeps being read
+HISTORY_COMPACT_STEP = 4
+HISTORY_MAX_TOOL_TEXT_CHARS = 4000
+# Mark the system prompt, tool definition, first turn and history tail as prompt-cache breakpoints
+PROMPT_CACHING = os.getenv("PROMPT_CACHING", "true").lower() == "true"
 USER_WARNING_DELAY = 0.3
 LOCK_RELEASE_DELAY = 0.1
 
+# Desktop execution backend: "local" drives the physical screen, "xvfb" runs a pool of
+# isolated virtual displays on Linux so several agent sessions can run in parallel
+DESKTOP_BACKEND = os.getenv("DESKTOP_BACKEND", "local")
+XVFB_DISPLAY_COUNT = int(os.getenv("XVFB_DISPLAY_COUNT", 2))
+XVFB_BASE_DISPLAY = int(os.getenv("XVFB_BASE_DISPLAY", 99))
+XVFB_STARTUP_WAIT = 0.5
+XVFB_SESSION_COMMAND = os.getenv("XVFB_SESSION_COMMAND", "")  # e.g. a window manager or browser to launch per display
+# Virtual displays have no Spotlight: URLs are opened by launching the browser with them
+# ({url} and a per-display {profile} directory are filled in)
+XVFB_BROWSER_COMMAND = os.getenv(
+    "XVFB_BROWSER_COMMAND",
+    "chromium --no-first-run --no-default-browser-check --user-data-dir={profile} --new-window {url}"
+)
+
+# Job queue for endpoint creation
+JOB_QUEUE_MAX_PENDING = 16  # Submissions beyond this are rejected with 429
+JOB_HISTORY_LIMIT = 200  # Finished jobs kept around for GET /jobs/<id>
+
+# Persistent cache for natural-language -> website extraction results
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
+EXTRACTION_CACHE_FILE = os.path.join(CACHE_DIR, "extraction_cache.json")
+EXTRACTION_CACHE_MAX_ENTRIES = 512
+EXTRACTION_CACHE_TTL = 7 * 24 * 3600  # Seconds - domains rarely change, but brands do move
+
+# Domain resolver chain (URL regex -> local brand index -> Claude)
+BRAND_INDEX_FILE = os.path.join(os.path.dirname(__file__), "data", "brand_domains.json")
+BRAND_FUZZY_CUTOFF = 0.85  # difflib ratio required for a fuzzy brand match
+RESOLVER_MIN_CONFIDENCE = 0.7  # Tiers answering below this fall through to the next tier
+
+# Documentation SSE stream - emit a checkpoint event every N chunks
+DOC_STREAM_CHECKPOINT_EVERY = 50
+DOC_REPLAY_CHUNK_CHARS = 2000  # Chunk size when replaying cached documentation over SSE
+
+# Event-driven waits (screen_waiter) - poll downscaled frames instead of sleeping a fixed time
+WAIT_POLL_INTERVAL = 0.05
+WAIT_DIFF_THRESHOLD = 2.0  # Mean absolute luminance difference (0-255) that counts as a change
+WAIT_THUMB_WIDTH = 160
+WAIT_STABLE_FRAMES = 3  # Consecutive unchanged polls before the screen counts as settled
+WAIT_DEFAULT_TIMEOUT = 5.0
+CLIPBOARD_MAX_WAIT = 0.5  # Upper bound for select-all/copy to reach the clipboard
+
 # Dynamic Spotlight timing configuration
 SPOTLIGHT_INITIAL_WAIT = 0.2
 SPOTLIGHT_CHECK_INTERVAL = 0.1
 SPOTLIGHT_MAX_WAIT = 2.0
 SPOTLIGHT_FALLBACK_WAIT = 0.8
 
+# Screen region detection (histogram signatures for Spotlight and other UI elements)
+REGION_SIGNATURES_FILE = os.path.join(CACHE_DIR, "region_signatures.json")
+REGION_MAX_HISTOGRAM_DISTANCE = 0.25  # Max total-variation distance from a learned reference
+
+# Persistent UI detector worker: "jxa" (macOS), "standin" (local test worker) or "none"
+UI_DETECTOR_BACKEND = os.getenv("UI_DETECTOR_BACKEND", "jxa" if sys.platform == "darwin" else "none")
+UI_DETECTOR_QUERY_TIMEOUT = 0.5
+
+# Adaptive timing model - waits derived from rolling percentiles of observed latencies
+TIMING_STORE_FILE = os.path.join(CACHE_DIR, "timing_model.json")
+TIMING_WINDOW = 50  # Samples kept per action (and per action@site)
+TIMING_MIN_SAMPLES = 5  # Below this the configured default wait is used
+TIMING_SAFETY_MARGIN = 1.25
+TIMING_MIN_WAIT = 0.05
+TIMING_MAX_FACTOR = 2.0  # Learned waits never exceed twice the configured default
+TIMING_SAVE_EVERY = 10  # Persist after this many new samples
+
+# Page capture: "cdp" reads the DOM over Chrome DevTools, "clipboard" uses select-all/copy
+DOM_CAPTURE_BACKEND = os.getenv("DOM_CAPTURE_BACKEND", "clipboard")
+CAPTURE_BACKENDS = ("cdp", "clipboard")
+CDP_ENDPOINT = os.getenv("CDP_ENDPOINT", "http://127.0.0.1:9222")
+CDP_TIMEOUT = 10.0  # Seconds per DevTools call (including page load)
+CDP_CHROME_BINARY = os.getenv("CDP_CHROME_BINARY", "")  # Empty = search PATH for chromium/chrome
+CDP_PROFILE_DIR = os.path.join(CACHE_DIR, "cdp-profile")
+
+# HTML pre-reduction before extraction - dropped elements (with their contents) and surviving attributes
+REDUCE_DROP_TAGS = ("head", "script", "style", "noscript", "template", "svg", "canvas", "iframe", "link", "meta")
+REDUCE_KEEP_ATTRIBUTES = ("href", "src", "alt", "class")  # class is cut to its first token
+REDUCE_FEED_CHARS = 65536  # Parser is fed in pieces of this size
+
+# HTML → JSON extraction - page split at its repeating item boundary, chunks extracted concurrently
+EXTRACT_MODEL = "claude-sonnet-4-20250514"
+EXTRACT_CHUNK_CHARS = 30000
+EXTRACT_MAX_WORKERS = 4
+EXTRACT_MAX_TOKENS = 4096  # Per chunk
+EXTRACT_MAX_FAILED_RATIO = 0.25  # More failed chunks than this fails the job (the last good JSON stays)
+EXTRACT_MIN_REPEATS = 3  # A tag+class must repeat this often to count as an item boundary
+
+# Learned selector recipes - refreshes reuse them instead of the extraction model
+RECIPE_STORE_FILE = os.path.join(CACHE_DIR, "selector_recipes.json")
+RECIPE_MIN_ITEMS = 3
+RECIPE_MIN_COUNT_RATIO = 0.5  # A refresh must find at least half as many items as the model did
+RECIPE_MIN_FILL = 0.9  # Share of items in which every learned field must be non-empty
+
+# Recorded action macros - successful agent runs are replayed locally, checkpoints verified by image diff
+MACRO_REPLAY_ENABLED = os.getenv("MACRO_REPLAY_ENABLED", "true").lower() == "true"
+MACRO_STORE_FILE = os.path.join(CACHE_DIR, "action_macros.json")
+MACRO_CHECKPOINT_THRESHOLD = 12.0  # Mean abs luminance diff (0-255) still counted as "same screen"
+MACRO_CHECKPOINT_TIMEOUT = 5.0  # How long a checkpoint may take to appear before the model takes over
+
+# Background refresh of dynamic endpoints (stale-while-revalidate)
+REFRESH_SCHEDULE_FILE = os.path.join(CACHE_DIR, "refresh_schedule.json")
+REFRESH_TICK_SECONDS = 5
+REFRESH_JITTER = 0.1  # Each run is due after interval * (1 ± jitter)
+REFRESH_MIN_INTERVAL = 60
+REFRESH_RETRY_AFTER = 10  # Seconds suggested to clients polling an endpoint whose first scrape is running
+
+# /navigate pipelining - open Spotlight (and optionally focus the browser) while the domain resolves
+NAVIGATE_PIPELINED = os.getenv("NAVIGATE_PIPELINED", "true").lower() == "true"
+PREWARM_BROWSER_APP = os.getenv("PREWARM_BROWSER_APP", "")  # e.g. "Safari"; empty = leave focus alone
+
+# Scripted "open URL" navigation - the agent loop only runs when on-screen verification fails
+SCRIPTED_NAVIGATION = os.getenv("SCRIPTED_NAVIGATION", "true").lower() == "true"
+SCRIPTED_NAV_SETTLE_TIMEOUT = 3.0  # Let the screen settle before taking over
+SCRIPTED_NAV_LOAD_TIMEOUT = 4.0  # Default page-load budget until per-site timings exist
+SCRIPTED_NAV_URL_TIMEOUT = 2.0  # osascript budget for reading the front browser's URL
+# AppleScript that reads the URL shown by each scriptable browser (keyed by application name)
+FRONT_URL_SCRIPTS = {
+    "Safari": 'tell application "Safari" to get URL of front document',
+    "Google Chrome": 'tell application "Google Chrome" to get URL of active tab of front window',
+    "Brave Browser": 'tell application "Brave Browser" to get URL of active tab of front window',
+    "Microsoft Edge": 'tell application "Microsoft Edge" to get URL of active tab of front window',
+    "Arc": 'tell application "Arc" to get URL of active tab of front window',
+}
+
+# Composite "batch" computer action
+BATCH_MAX_STEPS = 12
+BATCH_MAX_WAIT = 20.0  # Sum of wait_for_change timeouts allowed in one batch
+
 # System responsiveness calibration
 FAST_SYSTEM_THRESHOLD = 0.5
 SYSTEM_SPEED_MULTIPLIER = 1.0
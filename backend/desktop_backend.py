@@ -0,0 +1,232 @@
+"""
+Desktop Backend - Execution backends the agent drives instead of calling pyautogui directly
+LocalDesktopBackend controls the physical screen (macOS, one session at a time).
+XvfbDisplayBackend runs an isolated Xvfb display per worker on Linux, with input
+via xdotool and screenshots grabbed from that display, so several agent sessions
+can run side by side. There is no Spotlight on a bare X display, so URLs are
+opened with open_url() (the browser is launched with the URL). DisplayPool hands
+free displays to sessions.
+"""
+
+import os
+import time
+import queue
+import shlex
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from PIL import ImageGrab
+import pyautogui
+import config
+
+
+class LocalDesktopBackend:
+    """The physical screen, driven through pyautogui"""
+
+    is_local = True
+
+    def __init__(self, lock=None):
+        self.name = "local"
+        self.lock = lock or threading.Lock()  # Shared with everything else that touches the real screen
+
+    def __getattr__(self, attr):
+        # click, rightClick, doubleClick, moveTo, mouseDown, mouseUp, write,
+        # press, hotkey, keyDown, keyUp and scroll map straight onto pyautogui
+        return getattr(pyautogui, attr)
+
+    def screenshot(self):
+        return ImageGrab.grab()
+
+    def read_clipboard(self):
+        return subprocess.check_output(['pbpaste']).decode('utf-8', errors='ignore')
+
+    def _osascript(self, script):
+        output = subprocess.check_output(
+            ['osascript', '-e', script], stderr=subprocess.DEVNULL, timeout=config.SCRIPTED_NAV_URL_TIMEOUT
+        )
+        return output.decode('utf-8', errors='ignore').strip()
+
+    def front_page(self):
+        """
+        (frontmost app, URL it shows) read through AppleScript; the URL is None when the
+        frontmost app is not a scriptable browser. None if the screen can't be queried.
+        """
+        try:
+            app = self._osascript(
+                'tell application "System Events" to get name of first application process whose frontmost is true'
+            )
+            script = config.FRONT_URL_SCRIPTS.get(app)
+            return app, (self._osascript(script) if script else None)
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+
+class XvfbDisplayBackend:
+    """One private Xvfb display; input via xdotool, clipboard via xclip"""
+
+    is_local = False
+
+    # pyautogui key names -> X keysyms (macOS command shortcuts become ctrl shortcuts)
+    KEY_MAP = {
+        "command": "ctrl", "cmd": "ctrl", "ctrl": "ctrl", "control": "ctrl",
+        "option": "alt", "alt": "alt", "shift": "shift",
+        "return": "Return", "enter": "Return", "space": "space", "tab": "Tab",
+        "escape": "Escape", "esc": "Escape", "delete": "BackSpace", "backspace": "BackSpace",
+        "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+        "pageup": "Prior", "pagedown": "Next", "home": "Home", "end": "End",
+    }
+
+    def __init__(self, display_number, width=None, height=None):
+        self.display = f":{display_number}"
+        self.name = f"xvfb{self.display}"
+        self.width = width or config.DISPLAY_WIDTH
+        self.height = height or config.DISPLAY_HEIGHT
+        self.lock = threading.Lock()
+        self._env = {**os.environ, "DISPLAY": self.display}
+        self._processes = []
+        # One browser profile per display, so a launch never hands off to another display's browser
+        self.browser_profile = os.path.join(tempfile.gettempdir(), f"xvfb-browser-{display_number}")
+
+    def start(self):
+        """Start the Xvfb server (and the optional session command) for this display"""
+        self._processes.append(subprocess.Popen(
+            ["Xvfb", self.display, "-screen", "0", f"{self.width}x{self.height}x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        time.sleep(config.XVFB_STARTUP_WAIT)
+        if config.XVFB_SESSION_COMMAND:
+            self._processes.append(subprocess.Popen(
+                shlex.split(config.XVFB_SESSION_COMMAND), env=self._env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+        print(f"🖥️  Started virtual display {self.display} ({self.width}x{self.height})")
+
+    def open_url(self, url):
+        """Open url in this display's browser (stands in for Spotlight on macOS)"""
+        command = [
+            part.format(url=url, profile=self.browser_profile)
+            for part in shlex.split(config.XVFB_BROWSER_COMMAND)
+        ]
+        self._processes.append(subprocess.Popen(
+            command, env=self._env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        print(f"🌐 Opening {url} on {self.display}")
+
+    def stop(self):
+        for process in reversed(self._processes):
+            process.terminate()
+        self._processes = []
+
+    def _xdotool(self, *args):
+        subprocess.run(["xdotool", *[str(a) for a in args]], env=self._env, check=True)
+
+    def _key(self, key):
+        return self.KEY_MAP.get(key.lower(), key)
+
+    def screenshot(self):
+        return ImageGrab.grab(xdisplay=self.display)
+
+    def read_clipboard(self):
+        output = subprocess.check_output(["xclip", "-o", "-selection", "clipboard"], env=self._env)
+        return output.decode('utf-8', errors='ignore')
+
+    def front_page(self):
+        # open_url launches the browser with the URL itself, so there is no wrong target to detect
+        return None
+
+    def moveTo(self, x, y, duration=0):
+        self._xdotool("mousemove", x, y)
+
+    def click(self, x=None, y=None, button=1, repeat=1):
+        if x is not None and y is not None:
+            self.moveTo(x, y)
+        self._xdotool("click", "--repeat", repeat, button)
+
+    def rightClick(self, x=None, y=None):
+        self.click(x, y, button=3)
+
+    def doubleClick(self, x=None, y=None):
+        self.click(x, y, repeat=2)
+
+    def mouseDown(self, x=None, y=None):
+        if x is not None and y is not None:
+            self.moveTo(x, y)
+        self._xdotool("mousedown", 1)
+
+    def mouseUp(self, x=None, y=None):
+        self._xdotool("mouseup", 1)
+
+    def scroll(self, clicks):
+        # X11 scrolls with buttons 4 (up) / 5 (down); pyautogui passes pixels, ~100 per notch
+        notches = max(1, abs(int(clicks)) // 100)
+        self._xdotool("click", "--repeat", notches, 4 if clicks > 0 else 5)
+
+    def write(self, text):
+        self._xdotool("type", "--delay", 5, "--", text)
+
+    def press(self, key):
+        self._xdotool("key", self._key(key))
+
+    def hotkey(self, *keys):
+        self._xdotool("key", "+".join(self._key(k) for k in keys))
+
+    def keyDown(self, key):
+        self._xdotool("keydown", self._key(key))
+
+    def keyUp(self, key):
+        self._xdotool("keyup", self._key(key))
+
+
+class DisplayPool:
+    """Hands out free displays; each session holds its display (and its lock) until released"""
+
+    def __init__(self, backends):
+        self.backends = backends
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._free = queue.Queue()
+        for backend in backends:
+            self._free.put(backend)
+
+    @property
+    def size(self):
+        return len(self.backends)
+
+    def start(self):
+        """Start the displays that need a server process (Xvfb); safe to call repeatedly"""
+        with self._start_lock:
+            if self._started:
+                return
+            for backend in self.backends:
+                if hasattr(backend, "start"):
+                    backend.start()
+            self._started = True
+
+    @contextmanager
+    def acquire(self):
+        backend = self._free.get()
+        try:
+            with backend.lock:
+                yield backend
+        finally:
+            self._free.put(backend)
+
+    def shutdown(self):
+        for backend in self.backends:
+            if hasattr(backend, "stop"):
+                backend.stop()
+
+
+def create_display_pool(local_lock=None):
+    """
+    Build the pool selected by config.DESKTOP_BACKEND ("local" or "xvfb")
+    Xvfb servers are not launched here but by DisplayPool.start()
+    """
+    if config.DESKTOP_BACKEND == "xvfb":
+        return DisplayPool([
+            XvfbDisplayBackend(config.XVFB_BASE_DISPLAY + offset)
+            for offset in range(config.XVFB_DISPLAY_COUNT)
+        ])
+
+    return DisplayPool([LocalDesktopBackend(local_lock)])
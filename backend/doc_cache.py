@@ -0,0 +1,79 @@
+"""
+Documentation Cache - Persistent store for generated endpoint documentation
+Entries are keyed on the normalized request, the endpoint slug and the resolved
+website, stored as <slug>.<hash>.json files under temp/docs/, and dropped
+whenever the slug's data is refreshed so the docs never describe stale output.
+"""
+
+import os
+import re
+import json
+import time
+import glob
+import hashlib
+import threading
+from extraction_cache import ExtractionCache
+
+
+class DocumentationCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # put() calls for the same key share a .tmp path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _slug_prefix(endpoint_slug):
+        return re.sub(r'[^a-zA-Z0-9_-]', '', endpoint_slug or '') or '_'
+
+    def _path(self, user_request, endpoint_slug, website_url):
+        key = "|".join([ExtractionCache.normalize(user_request), endpoint_slug or '', website_url or ''])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self._slug_prefix(endpoint_slug)}.{digest}.json")
+
+    def get(self, user_request, endpoint_slug, website_url):
+        """Return the cached documentation string, or None"""
+        try:
+            with open(self._path(user_request, endpoint_slug, website_url), "r", encoding="utf-8") as fp:
+                entry = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry["documentation"]
+
+    def put(self, user_request, endpoint_slug, website_url, documentation):
+        """Persist documentation for the (request, slug, website) key"""
+        path = self._path(user_request, endpoint_slug, website_url)
+        tmp_path = f"{path}.tmp"
+        with self._write_lock:
+            with open(tmp_path, "w", encoding="utf-8") as fp:
+                json.dump({
+                    "request": user_request,
+                    "endpoint_slug": endpoint_slug,
+                    "website_url": website_url,
+                    "generated_at": time.time(),
+                    "documentation": documentation
+                }, fp, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def invalidate_slug(self, endpoint_slug):
+        """Drop every cached document for a slug (called when its data is refreshed)"""
+        for path in glob.glob(os.path.join(self.cache_dir, f"{self._slug_prefix(endpoint_slug)}.*.json")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(glob.glob(os.path.join(self.cache_dir, "*.json")))
+            }
@@ -0,0 +1,84 @@
+"""
+Doc Stream - Server-Sent Events protocol for streamed documentation
+Each chunk event carries only the new text (plus its offset), so bytes on
+the wire and server CPU grow linearly with document length. Periodic
+checkpoint events let clients verify they haven't dropped anything, and the
+final complete event carries the whole document once.
+"""
+
+import json
+import time
+import config
+
+
+def sse_event(payload):
+    """Format a dict as a single SSE data event"""
+    return "data: " + json.dumps(payload) + "\n\n"
+
+
+def stream_documentation_events(text_chunks, checkpoint_every=None, **complete_fields):
+    """
+    Yield SSE events for an iterable of text deltas
+    complete_fields are merged into the final "complete" event
+    """
+    checkpoint_every = checkpoint_every or config.DOC_STREAM_CHECKPOINT_EVERY
+    parts = []
+    length = 0
+
+    for text_chunk in text_chunks:
+        yield sse_event({"type": "chunk", "text": text_chunk, "offset": length})
+        parts.append(text_chunk)
+        length += len(text_chunk)
+
+        if len(parts) % checkpoint_every == 0:
+            yield sse_event({"type": "checkpoint", "length": length, "chunks": len(parts)})
+
+    yield sse_event({
+        "type": "complete",
+        "documentation": "".join(parts),
+        **complete_fields
+    })
+
+
+def replay_documentation_events(documentation, chunk_chars=None, **complete_fields):
+    """Yield the same event sequence for an already generated (cached) document"""
+    chunk_chars = chunk_chars or config.DOC_REPLAY_CHUNK_CHARS
+    chunks = (documentation[i:i + chunk_chars] for i in range(0, len(documentation), chunk_chars))
+    yield from stream_documentation_events(chunks, **complete_fields)
+
+
+def _legacy_events(text_chunks):
+    # Previous protocol: every chunk re-sent the whole document so far
+    parts = []
+    for text_chunk in text_chunks:
+        parts.append(text_chunk)
+        yield sse_event({"type": "chunk", "text": text_chunk, "partial_content": "".join(parts)})
+    yield sse_event({"type": "complete", "documentation": "".join(parts)})
+
+
+def benchmark(document_lengths=(2000, 8000, 32000), chunk_chars=12):
+    """
+    Compare bytes sent and CPU time of the legacy and delta protocols
+    Uses synthetic documents split into chunk_chars-sized deltas (roughly one token each)
+    """
+    results = []
+    for document_length in document_lengths:
+        document = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (document_length // 56 + 1))[:document_length]
+        chunks = [document[i:i + chunk_chars] for i in range(0, document_length, chunk_chars)]
+
+        row = {"document_chars": document_length, "chunks": len(chunks)}
+        for name, generator in (("legacy", _legacy_events), ("delta", stream_documentation_events)):
+            start_time = time.process_time()
+            sent_bytes = sum(len(event.encode("utf-8")) for event in generator(chunks))
+            row[f"{name}_bytes"] = sent_bytes
+            row[f"{name}_cpu_ms"] = (time.process_time() - start_time) * 1000
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    print("📊 Documentation stream benchmark (legacy partial_content vs delta protocol)")
+    for row in benchmark():
+        print(f"   {row['document_chars']:>6} chars / {row['chunks']:>5} chunks: "
+              f"legacy {row['legacy_bytes'] / 1024:9.1f} KiB {row['legacy_cpu_ms']:8.1f} ms | "
+              f"delta {row['delta_bytes'] / 1024:7.1f} KiB {row['delta_cpu_ms']:6.1f} ms")
@@ -0,0 +1,195 @@
+"""
+DOM Capture - Read serialized page HTML straight from Chromium over the DevTools protocol
+Replaces the select-all/copy/pbpaste dance (which yields rendered text, not
+HTML) with a direct Runtime.evaluate of document.documentElement.outerHTML on
+a Chromium started with --remote-debugging-port. The clipboard path in
+execute_computer_tool remains the fallback when no DevTools endpoint is reachable.
+"""
+
+import json
+import time
+import shutil
+import itertools
+import subprocess
+import urllib.request
+import config
+
+
+# Finds a link by its visible label, ignoring case and curly apostrophes
+FIND_LINK_SCRIPT = """(() => {
+    const clean = text => (text || "").replace(/\\u2019/g, "'").replace(/\\s+/g, " ").trim().toLowerCase();
+    const wanted = clean(%s);
+    const links = [...document.querySelectorAll("a[href]")];
+    const hit = links.find(a => clean(a.textContent) === wanted) || links.find(a => clean(a.textContent).includes(wanted));
+    return hit ? hit.href : null;
+})()"""
+
+
+class DomCaptureError(Exception):
+    """Raised when the DevTools endpoint is unreachable or the capture fails"""
+
+
+class CdpDomCapture:
+    def __init__(self, endpoint=None, timeout=None):
+        self.endpoint = (endpoint or config.CDP_ENDPOINT).rstrip('/')
+        self.timeout = timeout or config.CDP_TIMEOUT
+        self._ids = itertools.count(1)
+        self._browser = None
+
+    def _get_json(self, path, method="GET"):
+        req = urllib.request.Request(f"{self.endpoint}{path}", method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except OSError as e:
+            raise DomCaptureError(f"DevTools endpoint {self.endpoint} unreachable: {e}")
+
+    def available(self):
+        try:
+            self._get_json("/json/version")
+            return True
+        except DomCaptureError:
+            return False
+
+    def launch_headless(self):
+        """Start a headless Chromium exposing the DevTools endpoint, if one isn't running already"""
+        if self.available():
+            return
+        binary = config.CDP_CHROME_BINARY or next(
+            (shutil.which(name) for name in ("chromium", "chromium-browser", "google-chrome") if shutil.which(name)), None
+        )
+        if not binary:
+            raise DomCaptureError("No Chromium binary found to launch")
+        port = self.endpoint.rsplit(':', 1)[-1]
+        self._browser = subprocess.Popen(
+            [binary, "--headless=new", f"--remote-debugging-port={port}", "--no-first-run",
+             "--disable-gpu", "--user-data-dir=" + config.CDP_PROFILE_DIR, "about:blank"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if self.available():
+                print(f"🧭 Headless Chromium ready at {self.endpoint}")
+                return
+            time.sleep(0.1)
+        raise DomCaptureError("Headless Chromium did not expose its DevTools endpoint in time")
+
+    def _page_target(self):
+        for target in self._get_json("/json/list"):
+            if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+                return target
+        return self._get_json("/json/new?about:blank", method="PUT")
+
+    def _call(self, ws, method, params=None, wait_event=None):
+        """Send a CDP command and return its result (optionally waiting for an event first)"""
+        call_id = next(self._ids)
+        ws.send(json.dumps({"id": call_id, "method": method, "params": params or {}}))
+        result, event_seen = None, wait_event is None
+        deadline = time.time() + self.timeout
+        while (result is None or not event_seen) and time.time() < deadline:
+            message = json.loads(ws.recv())
+            if message.get("id") == call_id:
+                if "error" in message:
+                    raise DomCaptureError(f"{method} failed: {message['error'].get('message')}")
+                result = message.get("result", {})
+                if result.get("errorText"):
+                    # e.g. Page.navigate to an unresolvable host - don't wait for (or capture) Chrome's error page
+                    raise DomCaptureError(f"{method} failed: {result['errorText']}")
+            elif wait_event and message.get("method") == wait_event:
+                event_seen = True
+        if result is None or not event_seen:
+            raise DomCaptureError(f"{method} timed out after {self.timeout}s")
+        return result
+
+    def _navigate(self, ws, url):
+        if not url.startswith(("http://", "https://", "file://")):
+            url = f"https://{url}"
+        self._call(ws, "Page.navigate", {"url": url}, wait_event="Page.loadEventFired")
+
+    def _link_href(self, ws, link_text):
+        """Absolute href of the first link labelled link_text (exact label first, then substring)"""
+        evaluation = self._call(ws, "Runtime.evaluate", {
+            "expression": FIND_LINK_SCRIPT % json.dumps(link_text),
+            "returnByValue": True
+        })
+        return evaluation.get("result", {}).get("value")
+
+    def capture(self, url=None, follow_link=None):
+        """
+        Return the serialized DOM of the current page (or of url after navigating to it)
+        follow_link names a link (e.g. a section like "What's New") to open before capturing
+        Raises DomCaptureError when DevTools is unavailable, navigation fails or the link is missing
+        """
+        try:
+            import websocket  # websocket-client; optional, only needed for DevTools capture
+        except ImportError:
+            raise DomCaptureError("websocket-client is not installed")
+
+        target = self._page_target()
+        start_time = time.perf_counter()
+        try:
+            ws = websocket.create_connection(target["webSocketDebuggerUrl"], timeout=self.timeout, suppress_origin=True)
+        except (websocket.WebSocketException, OSError) as e:
+            raise DomCaptureError(f"DevTools connection to {self.endpoint} failed: {e}")
+        try:
+            if url or follow_link:
+                self._call(ws, "Page.enable")
+            if url:
+                self._navigate(ws, url)
+            if follow_link:
+                href = self._link_href(ws, follow_link)
+                if not href:
+                    raise DomCaptureError(f"No link labelled '{follow_link}' on the page")
+                self._navigate(ws, href)
+            evaluation = self._call(ws, "Runtime.evaluate", {
+                "expression": "document.documentElement.outerHTML",
+                "returnByValue": True
+            })
+        except (websocket.WebSocketException, OSError) as e:
+            # Slow page (recv timeout) or dropped connection: callers fall back to the desktop flow
+            raise DomCaptureError(f"DevTools connection to {self.endpoint} failed: {e}")
+        finally:
+            ws.close()
+
+        html_text = evaluation.get("result", {}).get("value") or ""
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"🧭 DOM captured via DevTools: {len(html_text)} chars in {elapsed_ms:.0f} ms")
+        return html_text
+
+    def shutdown(self):
+        if self._browser is not None:
+            self._browser.terminate()
+            self._browser = None
+
+
+# Global instance for reuse
+dom_capture = CdpDomCapture()
+
+
+if __name__ == "__main__":
+    # Capture a local static fixture served over HTTP through headless Chromium
+    import os
+    import sys
+    import tempfile
+    import threading
+    import functools
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp()
+    if len(sys.argv) == 1:
+        with open(os.path.join(fixture_dir, "index.html"), "w", encoding="utf-8") as fp:
+            fp.write("<!doctype html><html><body><ul>"
+                     + "".join(f"<li><a href='/p/{i}'>Product {i}</a> $ {i}.99</li>" for i in range(50))
+                     + "</ul></body></html>")
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=fixture_dir)
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    dom_capture.launch_headless()
+    try:
+        html = dom_capture.capture(f"http://127.0.0.1:{server.server_port}/index.html")
+        print(f"   starts with <html: {html.lower().startswith('<html')}, {len(html)} chars")
+    finally:
+        dom_capture.shutdown()
+        server.shutdown()
@@ -0,0 +1,206 @@
+"""
+Domain Resolver - Pluggable chain that turns user text into a target website
+Tiers are tried in order (URL regex -> local brand index -> Claude) and the
+first confident answer wins, so most common prompts never leave the process.
+Every tier reports its confidence and how long it took.
+"""
+
+import re
+import json
+import time
+import difflib
+import config
+
+
+URL_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})')
+
+# Filler words that never identify a site ("please take me to the github website")
+STOPWORDS = {
+    "a", "an", "the", "to", "go", "goto", "open", "visit", "navigate", "take", "me",
+    "please", "website", "site", "page", "homepage", "home", "web", "on", "at", "of",
+    "for", "show", "bring", "up", "can", "you", "i", "want", "need", "let", "lets",
+}
+
+# Verbs that make the next brand word an unambiguous target ("open zoom", "take me to target")
+NAVIGATION_VERBS = {"go", "goto", "open", "visit", "navigate", "take", "bring", "launch", "load", "browse", "show"}
+NAVIGATION_FILLER = {"to", "the", "me", "up", "us", "over", "a", "an"}
+
+# Brand aliases that are also everyday words or names; on their own they only count
+# right after a navigation verb, otherwise the text goes on to the next tier
+AMBIGUOUS_ALIASES = {
+    "apple", "amazon", "target", "zoom", "slack", "medium", "python", "notion", "outlook",
+    "claude", "uber", "wiki", "insta", "twitch", "bing", "yahoo",
+}
+
+EXACT_CONFIDENCE = 0.95
+AMBIGUOUS_CONFIDENCE = 0.5  # Below RESOLVER_MIN_CONFIDENCE: let the model decide
+
+
+class Resolution:
+    def __init__(self, website, tier, confidence, elapsed_ms, attempts):
+        self.website = website  # Resolved domain (or None when every tier gave up)
+        self.tier = tier  # Name of the tier that answered
+        self.confidence = confidence
+        self.elapsed_ms = elapsed_ms  # Total time spent across all tiers
+        self.attempts = attempts  # Per-tier report: name, website, confidence, elapsed_ms
+
+    def to_dict(self):
+        return {
+            "tier": self.tier,
+            "confidence": round(self.confidence, 3),
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "attempts": self.attempts
+        }
+
+
+class UrlRegexTier:
+    name = "direct_url"
+
+    def resolve(self, text, agent=None):
+        """Return (website, confidence) when the text already contains a URL/domain"""
+        match = URL_PATTERN.search(text)
+        if match:
+            return match.group(1), 1.0
+        return None, 0.0
+
+
+class BrandIndexTier:
+    name = "brand_index"
+
+    def __init__(self, index_path=None, fuzzy_cutoff=None):
+        self.index_path = index_path or config.BRAND_INDEX_FILE
+        self.fuzzy_cutoff = fuzzy_cutoff or config.BRAND_FUZZY_CUTOFF
+        self.aliases = {}  # alias -> domain
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fp:
+                index = json.load(fp)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"⚠️  Brand index unavailable ({e}) - brand tier disabled")
+            return
+
+        for domain, aliases in index.items():
+            for alias in aliases:
+                self.aliases[self._normalize(alias)] = domain
+
+    @staticmethod
+    def _normalize(text):
+        text = text.lower().replace("'", "").replace("’", "")
+        return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+    @staticmethod
+    def _after_navigation_verb(tokens, position):
+        """True when tokens[position] follows a navigation verb ("go to the <brand>")"""
+        for token in reversed(tokens[:position]):
+            if token in NAVIGATION_VERBS:
+                return True
+            if token not in NAVIGATION_FILLER:
+                return False
+        return False
+
+    def _candidates(self, text):
+        """Yield (phrase, start, size) for 3/2/1-token phrases (longest first) with stopwords removed"""
+        tokens = [t for t in self._normalize(text).split() if t not in STOPWORDS]
+        for size in (3, 2, 1):
+            for start in range(len(tokens) - size + 1):
+                phrase = tokens[start:start + size]
+                yield " ".join(phrase), start, size
+                if size > 1:
+                    yield "".join(phrase), start, size  # "stack overflow" should also hit "stackoverflow"
+
+    def resolve(self, text, agent=None):
+        """Return (website, confidence) from exact token matches, then fuzzy matches"""
+        if not self.aliases:
+            return None, 0.0
+
+        candidates = list(self._candidates(text))
+        raw_tokens = self._normalize(text).split()
+        content_positions = [index for index, token in enumerate(raw_tokens) if token not in STOPWORDS]
+
+        # Exact hits; tokens covered by a longer hit ("google maps") don't count again ("google")
+        hits, covered = [], set()
+        for phrase, start, size in candidates:
+            span = set(range(start, start + size))
+            if phrase not in self.aliases or span & covered:
+                continue
+            covered |= span
+            confidence = EXACT_CONFIDENCE
+            if (size == 1 and phrase in AMBIGUOUS_ALIASES and len(content_positions) > 1
+                    and not self._after_navigation_verb(raw_tokens, content_positions[start])):
+                confidence = AMBIGUOUS_CONFIDENCE  # A bare "zoom" is still the site
+            hits.append((self.aliases[phrase], confidence))
+        if hits:
+            if len({domain for domain, _ in hits}) > 1:
+                # "check target prices at walmart" names two sites - not a lookup the index can settle
+                return hits[0][0], AMBIGUOUS_CONFIDENCE
+            return max(hits, key=lambda hit: hit[1])
+
+        # Fuzzy pass only for phrases long enough that a close match is meaningful
+        best_domain, best_ratio = None, 0.0
+        for phrase, _, _ in candidates:
+            if len(phrase) < 4:
+                continue
+            for alias in difflib.get_close_matches(phrase, self.aliases.keys(), n=1, cutoff=self.fuzzy_cutoff):
+                ratio = difflib.SequenceMatcher(None, phrase, alias).ratio()
+                if ratio > best_ratio:
+                    best_domain, best_ratio = self.aliases[alias], ratio
+
+        if best_domain:
+            return best_domain, best_ratio * 0.9
+        return None, 0.0
+
+
+class LlmTier:
+    name = "claude_extraction"
+
+    def resolve(self, text, agent=None):
+        """Return (website, confidence) from the agent's Claude extractor"""
+        if agent is None:
+            return None, 0.0
+        website = agent.extract_website_from_text(text)
+        return website, 0.8 if website else 0.0
+
+
+class DomainResolver:
+    def __init__(self, tiers=None, min_confidence=None):
+        self.tiers = tiers if tiers is not None else [UrlRegexTier(), BrandIndexTier(), LlmTier()]
+        self.min_confidence = min_confidence or config.RESOLVER_MIN_CONFIDENCE
+
+    def resolve(self, text, agent=None):
+        """
+        Run the tiers in order and return a Resolution
+        agent is only needed by tiers that call the model
+        """
+        attempts = []
+        start_time = time.perf_counter()
+
+        for tier in self.tiers:
+            tier_start = time.perf_counter()
+            try:
+                website, confidence = tier.resolve(text, agent)
+            except Exception as e:
+                print(f"❌ Resolver tier '{tier.name}' failed: {e}")
+                website, confidence = None, 0.0
+            tier_ms = (time.perf_counter() - tier_start) * 1000
+
+            attempts.append({
+                "tier": tier.name,
+                "website": website,
+                "confidence": round(confidence, 3),
+                "elapsed_ms": round(tier_ms, 3)
+            })
+
+            if website and confidence >= self.min_confidence:
+                total_ms = (time.perf_counter() - start_time) * 1000
+                print(f"🎯 Resolver tier '{tier.name}' answered '{website}' "
+                      f"(confidence {confidence:.2f}, {tier_ms:.1f} ms)")
+                return Resolution(website, tier.name, confidence, total_ms, attempts)
+
+        total_ms = (time.perf_counter() - start_time) * 1000
+        return Resolution(None, attempts[-1]["tier"] if attempts else None, 0.0, total_ms, attempts)
+
+
+# Global instance for reuse
+domain_resolver = DomainResolver()
@@ -0,0 +1,70 @@
+"""
+Endpoint Cache - In-memory response cache for dynamic slug endpoints
+Keeps the pre-serialized JSON body for every slug so GET requests don't
+re-open and re-parse temp/<slug>.json on every hit. Entries are invalidated
+when the file's mtime changes or when the scraper explicitly signals a rewrite.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+
+class CachedPayload:
+    def __init__(self, body, etag, mtime):
+        self.body = body  # Pre-serialized UTF-8 JSON bytes
+        self.etag = etag  # Strong ETag (quoted) derived from the body
+        self.mtime = mtime  # mtime_ns of the file the body was built from
+
+
+class EndpointCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, slug, file_path):
+        """
+        Return the CachedPayload for a slug, reloading from disk if the file changed
+        Raises FileNotFoundError if the data file doesn't exist
+        """
+        mtime = os.stat(file_path).st_mtime_ns
+
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None and entry.mtime == mtime:
+                self.hits += 1
+                return entry
+
+        # Miss (or stale) - load outside the lock so slow reads don't block other slugs
+        with open(file_path, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = CachedPayload(body, etag, mtime)
+
+        with self._lock:
+            self._entries[slug] = entry
+            self.misses += 1
+        return entry
+
+    def invalidate(self, slug):
+        """Drop the cached payload for a slug (called after the JSON is rewritten)"""
+        with self._lock:
+            self._entries.pop(slug, None)
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached slugs"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_slugs": len(self._entries)
+            }
+
+
+# Global instance for reuse
+endpoint_cache = EndpointCache()
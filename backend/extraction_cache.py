@@ -0,0 +1,115 @@
+"""
+Extraction Cache - Persistent LRU cache for extract_website_from_text results
+Normalizes the user's prompt so trivially different phrasings ("Go to GitHub",
+"go to github!") share an entry, evicts least-recently-used entries beyond
+a size limit, expires entries after a TTL and persists to a local JSON file
+so resolved prompts survive server restarts.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+import config
+
+
+class ExtractionCache:
+    def __init__(self, file_path=None, max_entries=None, ttl_seconds=None):
+        self.file_path = file_path or config.EXTRACTION_CACHE_FILE
+        self.max_entries = max_entries or config.EXTRACTION_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or config.EXTRACTION_CACHE_TTL
+        self._entries = OrderedDict()  # normalized prompt -> (website, stored_at)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # One _save at a time: they share the .tmp file
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def normalize(text):
+        """Lower-case, strip punctuation (except domain characters) and collapse whitespace"""
+        text = text.lower().strip()
+        text = re.sub(r"[^a-z0-9.\-'/: ]+", " ", text)
+        return re.sub(r"\s+", " ", text).strip(" .")
+
+    def get(self, text):
+        """
+        Return (found, website) for a prompt
+        website may be None when a previous extraction was UNCLEAR
+        """
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            website, stored_at = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, website
+
+    def put(self, text, website):
+        """Store an extraction result and persist the cache"""
+        key = self.normalize(text)
+        with self._lock:
+            self._entries[key] = (website, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._save()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries)
+            }
+
+    def _load(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as fp:
+                stored = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+
+        now = time.time()
+        for entry in stored if isinstance(stored, list) else []:
+            try:
+                key, website, stored_at = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries[key] = (website, stored_at)
+            except (TypeError, ValueError):
+                continue  # Skip a malformed entry rather than fail at import
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        # Write to a temp file and rename so a crash never leaves a truncated cache behind;
+        # the write lock keeps concurrent saves off the shared temp file and in order
+        tmp_path = f"{self.file_path}.tmp"
+        with self._write_lock:
+            with self._lock:
+                snapshot = list(self._entries.items())
+            try:
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as fp:
+                    json.dump([[key, website, stored_at] for key, (website, stored_at) in snapshot], fp)
+                os.replace(tmp_path, self.file_path)
+            except OSError as e:
+                print(f"⚠️  Failed to persist extraction cache: {e}")
+
+
+# Global instance for reuse
+extraction_cache = ExtractionCache()
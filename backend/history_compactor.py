@@ -0,0 +1,101 @@
+"""
+History Compactor - Keeps agent_loop request payloads from growing quadratically
+Only the most recent screenshots are resent as images; older ones become a short
+text placeholder. Screenshots are retired in steps (between keep_screenshots and
+keep_screenshots + compact_step - 1 stay as images) rather than one per iteration:
+every retirement rewrites the middle of the history, and an unchanged prefix is
+what lets the prompt cache read it back. Oversized text tool results (e.g. capture_html dumps) are
+truncated. The caller's message list is never modified - compaction produces
+the view that is sent to the model, so downstream consumers (like the HTML
+extraction in _scrape_and_store) still see the full results.
+"""
+
+import json
+import config
+
+
+SCREENSHOT_PLACEHOLDER = "[Earlier screenshot omitted to save context - take a new screenshot if needed]"
+
+
+def _to_jsonable(obj):
+    # SDK content blocks (BetaTextBlock, BetaToolUseBlock, ...) are pydantic models
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+class HistoryCompactor:
+    def __init__(self, keep_screenshots=None, max_tool_text_chars=None, compact_step=None):
+        self.keep_screenshots = keep_screenshots if keep_screenshots is not None else config.HISTORY_KEEP_SCREENSHOTS
+        self.max_tool_text_chars = max_tool_text_chars or config.HISTORY_MAX_TOOL_TEXT_CHARS
+        self.compact_step = max(1, compact_step or config.HISTORY_COMPACT_STEP)
+
+    @staticmethod
+    def _is_image_result(block):
+        content = block.get("content")
+        return isinstance(content, list) and any(
+            isinstance(part, dict) and part.get("type") == "image" for part in content
+        )
+
+    def compact(self, messages):
+        """Return a compacted copy of the message list suitable for the next request"""
+        # Locate every screenshot tool_result, newest last
+        image_positions = []
+        for msg_index, msg in enumerate(messages):
+            content = msg.get("content")
+            if msg.get("role") != "user" or not isinstance(content, list):
+                continue
+            for block_index, block in enumerate(content):
+                if isinstance(block, dict) and block.get("type") == "tool_result" and self._is_image_result(block):
+                    image_positions.append((msg_index, block_index))
+
+        # Retire the oldest screenshots a whole step at a time so the prefix stays fixed in between
+        excess = max(0, len(image_positions) - self.keep_screenshots)
+        stale_images = set(image_positions[:excess // self.compact_step * self.compact_step])
+
+        compacted = []
+        for msg_index, msg in enumerate(messages):
+            content = msg.get("content")
+            if msg.get("role") != "user" or not isinstance(content, list):
+                compacted.append(msg)
+                continue
+
+            new_content = []
+            changed = False
+            for block_index, block in enumerate(content):
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    new_content.append(block)
+                    continue
+
+                if (msg_index, block_index) in stale_images:
+                    # Only the image goes; other parts (the step summary of a batch result) stay
+                    kept = [
+                        part for part in block["content"]
+                        if not (isinstance(part, dict) and part.get("type") == "image")
+                    ]
+                    placeholder = ([*kept, {"type": "text", "text": SCREENSHOT_PLACEHOLDER}] if kept
+                                   else SCREENSHOT_PLACEHOLDER)
+                    block = {**block, "content": placeholder}
+                    changed = True
+                elif isinstance(block.get("content"), str) and len(block["content"]) > self.max_tool_text_chars:
+                    text = block["content"]
+                    omitted = len(text) - self.max_tool_text_chars
+                    block = {
+                        **block,
+                        "content": f"{text[:self.max_tool_text_chars]}\n... [{omitted} characters truncated]"
+                    }
+                    changed = True
+                new_content.append(block)
+
+            compacted.append({**msg, "content": new_content} if changed else msg)
+
+        return compacted
+
+    @staticmethod
+    def request_bytes(messages):
+        """Approximate serialized size of a message list as sent on the wire"""
+        return len(json.dumps(messages, default=_to_jsonable).encode("utf-8"))
+
+
+# Global instance for reuse
+history_compactor = HistoryCompactor()
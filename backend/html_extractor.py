@@ -0,0 +1,223 @@
+"""
+HTML Extractor - Chunked map-reduce HTML → JSON extraction
+A single extraction call over html[:100000] with a 1024-token answer silently
+drops everything past the cut and overflows on long product lists. Instead the
+page is split along its repeating DOM boundary (the most frequent tag+class
+opening, e.g. one <li class="ProductCard"> per product), the pieces are packed
+into chunks, each chunk is extracted concurrently on a bounded worker pool and
+the partial arrays are merged and de-duplicated by product_url.
+"""
+
+import re
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+
+DEFAULT_SYSTEM = (
+    "You are an API data extractor. Convert the product listings in this HTML fragment into a JSON array. "
+    "Each object must contain: product_name, price, product_url, image_url. Output ONLY JSON."
+)
+
+FRAGMENT_NOTE = (
+    " The input is one fragment of a larger page; extract only the items fully or partially present in it "
+    "and output [] if there are none."
+)
+
+BOUNDARY_TAG = re.compile(r'<(li|article|div|section|tr|a)\b[^>]*?\bclass\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def find_boundary(html, min_repeats=None):
+    """Return (tag, class, offsets) of the most frequently repeated opening tag, or None"""
+    min_repeats = min_repeats or config.EXTRACT_MIN_REPEATS
+    openings = [(m.group(1).lower(), m.group(2).strip(), m.start()) for m in BOUNDARY_TAG.finditer(html)]
+    if not openings:
+        return None
+    (tag, cls), count = Counter((tag, cls) for tag, cls, _ in openings).most_common(1)[0]
+    if count < min_repeats:
+        return None
+    return tag, cls, [offset for t, c, offset in openings if (t, c) == (tag, cls)]
+
+
+def _split_oversized(segment, limit):
+    # Last resort for a single item larger than a chunk: cut at a tag start near the limit
+    pieces = []
+    while len(segment) > limit:
+        cut = segment.rfind('<', limit // 2, limit)
+        cut = cut if cut > 0 else limit
+        pieces.append(segment[:cut])
+        segment = segment[cut:]
+    pieces.append(segment)
+    return pieces
+
+
+def split_html(html, chunk_chars=None):
+    """
+    Split html into chunks of at most chunk_chars, cutting only at repeated item
+    boundaries when one is found. Returns (chunks, boundary description or None)
+    """
+    chunk_chars = chunk_chars or config.EXTRACT_CHUNK_CHARS
+    boundary = find_boundary(html)
+    if boundary:
+        tag, cls, offsets = boundary
+        cuts = [0] + offsets + [len(html)]
+        segments = [html[start:end] for start, end in zip(cuts, cuts[1:]) if end > start]
+        label = f"<{tag} class=\"{cls}\"> x{len(offsets)}"
+    else:
+        segments, label = [html], None
+
+    chunks, current = [], ""
+    for segment in segments:
+        for piece in _split_oversized(segment, chunk_chars):
+            if current and len(current) + len(piece) > chunk_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks, label
+
+
+def parse_records(text):
+    """Parse a model answer into a list of records (tolerates code fences and {"items": [...]})"""
+    data = json.loads(JSON_FENCE.sub('', text.strip()))
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [data])
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a JSON array, got {type(data).__name__}")
+    return [record for record in data if isinstance(record, dict)]
+
+
+def merge_records(partials):
+    """
+    Concatenate per-chunk record lists in page order, de-duplicating by product_url
+    (an item cut across two chunks shows up in both); later copies only fill in missing fields
+    """
+    merged, by_url = [], {}
+    for records in partials:
+        for record in records:
+            url = (record.get("product_url") or "").strip().rstrip('/')
+            if not url:
+                if record not in merged:
+                    merged.append(record)
+                continue
+            existing = by_url.get(url)
+            if existing is None:
+                by_url[url] = record
+                merged.append(record)
+            else:
+                for key, value in record.items():
+                    if value not in (None, "") and existing.get(key) in (None, ""):
+                        existing[key] = value
+    return merged
+
+
+class HtmlExtractor:
+    def __init__(self, client, model=None, system=None, chunk_chars=None, max_workers=None, max_tokens=None,
+                 max_failed_ratio=None):
+        self.client = client
+        self.model = model or config.EXTRACT_MODEL
+        self.system = (system or DEFAULT_SYSTEM) + FRAGMENT_NOTE
+        self.chunk_chars = chunk_chars or config.EXTRACT_CHUNK_CHARS
+        self.max_workers = max_workers or config.EXTRACT_MAX_WORKERS
+        self.max_tokens = max_tokens or config.EXTRACT_MAX_TOKENS
+        self.max_failed_ratio = config.EXTRACT_MAX_FAILED_RATIO if max_failed_ratio is None else max_failed_ratio
+
+    def _extract_chunk(self, index, chunk):
+        start_time = time.perf_counter()
+        timing = {"chunk": index, "chars": len(chunk), "records": 0, "error": None}
+        try:
+            response = self.client.messages.create(
+                model=self.model,
+                system=self.system,
+                max_tokens=self.max_tokens,
+                messages=[{"role": "user", "content": chunk}]
+            )
+            records = parse_records(response.content[0].text)
+            timing["records"] = len(records)
+        except Exception as e:
+            records = []
+            timing["error"] = str(e)
+            print(f"⚠️  Extraction chunk {index} failed: {e}")
+        timing["ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        return records, timing
+
+    def extract(self, html):
+        """
+        Map-reduce the page into one de-duplicated record list
+        Returns (records, report); raises RuntimeError when more than max_failed_ratio of the
+        chunks failed - a partial list must not replace the endpoint's last good data
+        """
+        start_time = time.perf_counter()
+        chunks, boundary = split_html(html, self.chunk_chars)
+        workers = max(1, min(self.max_workers, len(chunks)))
+        print(f"🧩 Extracting {len(html)} chars as {len(chunks)} chunk(s) on {workers} worker(s)"
+              f" (boundary: {boundary or 'none'})")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self._extract_chunk, range(len(chunks)), chunks))
+
+        timings = [timing for _, timing in results]
+        failed = sum(1 for timing in timings if timing["error"])
+        if chunks and failed / len(chunks) > self.max_failed_ratio:
+            first_error = next(timing["error"] for timing in timings if timing["error"])
+            raise RuntimeError(f"{failed} of {len(chunks)} extraction chunks failed: {first_error}")
+
+        records = merge_records(records for records, _ in results)
+        report = {
+            "boundary": boundary,
+            "chunks": len(chunks),
+            "workers": workers,
+            "failed_chunks": failed,
+            "records": len(records),
+            "total_ms": round((time.perf_counter() - start_time) * 1000, 1),
+            "chunk_timings": timings
+        }
+        print(f"✅ Extracted {len(records)} records in {report['total_ms']:.0f} ms ({failed} chunk(s) failed)")
+        return records, report
+
+
+if __name__ == "__main__":
+    # Sequential vs pooled extraction of a synthetic 400-product page with a fake client
+    from types import SimpleNamespace
+
+    class FakeMessages:
+        latency = 0.2  # Simulated model round trip
+
+        def create(self, model, system, max_tokens, messages):
+            time.sleep(self.latency)
+            items = re.findall(r"<a href='(/p/\d+)'>([^<]+)</a>\s*<span>([^<]+)</span>", messages[0]["content"])
+            text = json.dumps([{"product_name": name, "price": price, "product_url": url, "image_url": None}
+                               for url, name, price in items])
+            return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+    fake_client = SimpleNamespace(messages=FakeMessages())
+    page = ("<html><head><title>What's New</title></head><body><ul>"
+            + "".join(f"<li class='ProductCard'><a href='/p/{i}'>Product {i}</a> <span>$ {i}.99</span></li>"
+                      for i in range(400))
+            + "</ul></body></html>")
+
+    for workers in (1, 4):
+        records, report = HtmlExtractor(fake_client, chunk_chars=4000, max_workers=workers).extract(page)
+        assert len(records) == 400
+        slowest = max(timing["ms"] for timing in report["chunk_timings"])
+        print(f"   {workers} worker(s): {report['chunks']} chunks, {report['total_ms']:.0f} ms total,"
+              f" slowest chunk {slowest:.0f} ms")
+
+    # Most chunks failing must fail the extraction instead of returning a partial list
+    class FlakyMessages(FakeMessages):
+        latency = 0.0
+
+        def create(self, model, system, max_tokens, messages):
+            if "/p/0'" not in messages[0]["content"]:
+                raise RuntimeError("overloaded")
+            return super().create(model, system, max_tokens, messages)
+
+    try:
+        HtmlExtractor(SimpleNamespace(messages=FlakyMessages()), chunk_chars=4000).extract(page)
+        raise AssertionError("partial extraction was accepted")
+    except RuntimeError as e:
+        print(f"   mostly failed chunks rejected: {e}")
@@ -0,0 +1,136 @@
+"""
+HTML Reducer - Strip captured pages down to what the extractor actually reads
+Raw captures carry scripts, styles, inline SVG, tracking attributes and layout
+whitespace that cost input tokens without adding content. The page is fed
+through an incremental HTMLParser in pieces; non-content elements are dropped
+with everything inside them, whitespace is collapsed and only a short list of
+attributes survives (links, image sources, alt text and the first class token,
+which the extractor uses to find repeating item boundaries).
+"""
+
+import re
+import time
+from html import escape
+from html.parser import HTMLParser
+import config
+
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+WHITESPACE = re.compile(r'\s+')
+
+
+class _ReducingParser(HTMLParser):
+    def __init__(self, drop_tags, keep_attributes):
+        super().__init__(convert_charrefs=True)
+        self.drop_tags = drop_tags
+        self.keep_attributes = keep_attributes
+        self.skip_depth = 0  # > 0 while inside a dropped element
+        self.out = []
+
+    def _attributes(self, attrs):
+        kept = []
+        for name, value in attrs:
+            if name not in self.keep_attributes or not value:
+                continue
+            if name == "class":
+                value = value.split()[0]
+            if name in ("href", "src") and value.startswith("data:"):
+                continue  # Inline payloads are bytes, not content
+            kept.append(f' {name}="{escape(value.strip())}"')
+        return "".join(kept)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.drop_tags:
+            if tag not in VOID_TAGS:
+                self.skip_depth += 1
+            return
+        if not self.skip_depth:
+            self.out.append(f"<{tag}{self._attributes(attrs)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in self.drop_tags and not self.skip_depth:
+            self.out.append(f"<{tag}{self._attributes(attrs)}>")
+
+    def handle_endtag(self, tag):
+        if tag in self.drop_tags:
+            if tag not in VOID_TAGS and self.skip_depth:
+                self.skip_depth -= 1
+            return
+        if not self.skip_depth and tag not in VOID_TAGS:
+            self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        text = WHITESPACE.sub(' ', data)
+        if text.strip():
+            self.out.append(escape(text, quote=False))
+
+    def drain(self):
+        piece = "".join(self.out)
+        self.out = []
+        return piece
+
+
+class HtmlReducer:
+    def __init__(self, drop_tags=None, keep_attributes=None, feed_chars=None):
+        self.drop_tags = set(drop_tags or config.REDUCE_DROP_TAGS)
+        self.keep_attributes = set(keep_attributes or config.REDUCE_KEEP_ATTRIBUTES)
+        self.feed_chars = feed_chars or config.REDUCE_FEED_CHARS
+
+    def reduce_stream(self, pieces):
+        """Feed HTML pieces through the parser, yielding reduced output as soon as it is available"""
+        parser = _ReducingParser(self.drop_tags, self.keep_attributes)
+        for piece in pieces:
+            parser.feed(piece)
+            reduced = parser.drain()
+            if reduced:
+                yield reduced
+        parser.close()
+        reduced = parser.drain()
+        if reduced:
+            yield reduced
+
+    def reduce(self, html):
+        """Return (reduced html, report with bytes before/after and elapsed time)"""
+        start_time = time.perf_counter()
+        pieces = (html[i:i + self.feed_chars] for i in range(0, len(html), self.feed_chars))
+        reduced = "".join(self.reduce_stream(pieces))
+
+        bytes_before = len(html.encode("utf-8"))
+        bytes_after = len(reduced.encode("utf-8"))
+        report = {
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "reduction": round(1 - bytes_after / bytes_before, 3) if bytes_before else 0.0,
+            "ms": round((time.perf_counter() - start_time) * 1000, 1)
+        }
+        print(f"🧹 Reduced HTML {bytes_before} → {bytes_after} bytes "
+              f"({report['reduction']:.0%} smaller) in {report['ms']:.0f} ms")
+        return reduced, report
+
+
+# Global instance for reuse
+html_reducer = HtmlReducer()
+
+
+if __name__ == "__main__":
+    # Reduce a capture given on the command line, or a synthetic page with typical noise
+    import sys
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8", errors="replace") as fp:
+            page = fp.read()
+    else:
+        noise = ("<script>window.dataLayer=[" + "{'event':'view'}," * 200 + "]</script>"
+                 "<style>" + ".x{color:red}\n" * 200 + "</style>")
+        icon = "<svg viewBox='0 0 24 24'>" + "<path d='M0 0L24 24'/>" * 10 + "</svg>"
+        page = ("<html><head><meta charset='utf-8'>" + noise + "</head><body><ul>"
+                + "".join(f"\n    <li class='ProductCard ProductCard_card__x1' data-track='{i}' style='margin:0'>"
+                          f"{icon}<a href='/p/{i}' data-analytics='card'>  Product {i}  </a>"
+                          f"<img src='/img/{i}.jpg' alt='Product {i}' loading='lazy'>"
+                          f"<span class='Price'>$ {i}.99</span></li>" for i in range(200))
+                + "</ul>" + noise + "</body></html>")
+
+    reduced, report = html_reducer.reduce(page)
+    print(reduced[:300])
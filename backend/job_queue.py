@@ -0,0 +1,115 @@
+"""
+Job Queue - Bounded queue of desktop-driving jobs with pollable status
+Every job gets an ID the client can poll at GET /jobs/<id>. One worker per
+display in the DisplayPool drains the queue; each job runs with a display it
+owns exclusively, so bursts of requests wait their turn instead of being
+rejected and throughput scales with the number of displays.
+"""
+
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+import config
+
+
+class Job:
+    def __init__(self, kind, func, metadata=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.func = func
+        self.metadata = metadata or {}
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        now = time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "metadata": self.metadata,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round((self.started_at or now) - self.created_at, 3),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    def __init__(self, display_pool, max_pending=None, history_limit=None):
+        self.display_pool = display_pool  # Jobs receive a display from here and hold it while running
+        self.history_limit = history_limit or config.JOB_HISTORY_LIMIT
+        self._pending = queue.Queue(maxsize=max_pending or config.JOB_QUEUE_MAX_PENDING)
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._workers = []
+
+    def submit(self, kind, func, metadata=None):
+        """
+        Enqueue func(display) as a new job and return it
+        Raises queue.Full when the queue is at capacity
+        """
+        job = Job(kind, func, metadata)
+        self._pending.put_nowait(job)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        self._ensure_workers()
+        print(f"📥 Queued {kind} job {job.id} ({self._pending.qsize()} pending)")
+        return job
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def pending_count(self):
+        return self._pending.qsize()
+
+    def position(self, job):
+        """1-based place of a queued job in line (jobs run in submission order); None once it started"""
+        with self._jobs_lock:
+            queued = [queued_job for queued_job in self._jobs.values() if queued_job.status == "queued"]
+        return queued.index(job) + 1 if job in queued else None
+
+    def _ensure_workers(self):
+        self.display_pool.start()  # Displays come up with the first job, not at import
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.display_pool.size:
+            worker = threading.Thread(target=self._run, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            with self.display_pool.acquire() as display:
+                job.status = "running"
+                job.started_at = time.time()
+                job.metadata["display"] = display.name
+                print(f"▶️  Running {job.kind} job {job.id} on {display.name}")
+                try:
+                    job.result = job.func(display)
+                    job.status = "succeeded"
+                except Exception as e:
+                    job.error = str(e)
+                    job.status = "failed"
+                    print(f"❌ Job {job.id} failed: {e}")
+                finally:
+                    job.finished_at = time.time()
+            self._pending.task_done()
+
+    def _trim_history(self):
+        # Forget the oldest finished jobs; queued/running jobs are always kept
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("succeeded", "failed")]
+        excess = len(self._jobs) - self.history_limit
+        for job_id in finished[:max(0, excess)]:
+            del self._jobs[job_id]
@@ -0,0 +1,160 @@
+"""
+Prompt Cache - Cache breakpoints for agent_loop requests
+Every iteration resends the same system prompt, computer tool definition and
+initial task message, followed by a history that only ever grows at the end.
+Marking those prefixes with cache_control lets the API read them from its
+prompt cache instead of re-processing them. The four breakpoints the API
+allows are spent on:
+
+    1. the computer tool definition
+    2. the system prompt
+    3. the first user turn (the long task description)
+    4. the last block of the newest message (the growing history)
+
+Breakpoint 4 only pays off if the history before it is unchanged on the next
+request; history_compactor therefore retires old screenshots in steps
+(HISTORY_COMPACT_STEP) instead of rewriting the middle of the history on every
+iteration. Messages are copied before marking; the caller's history is never modified.
+Cache read/write token counts from each response's usage are kept per
+iteration and in total.
+"""
+
+import threading
+import config
+
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+def _mark_last_block(message):
+    """Copy of message whose last content block carries a cache breakpoint"""
+    content = message.get("content")
+    if isinstance(content, str):
+        return {**message, "content": [{"type": "text", "text": content, "cache_control": EPHEMERAL}]}
+    if isinstance(content, list) and content and isinstance(content[-1], dict):
+        return {**message, "content": [*content[:-1], {**content[-1], "cache_control": EPHEMERAL}]}
+    return message  # SDK block objects (assistant turns) are left as they are
+
+
+class PromptCache:
+    def __init__(self, enabled=None):
+        self.enabled = config.PROMPT_CACHING if enabled is None else enabled
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.input_tokens = 0
+
+    def apply(self, request_kwargs):
+        """Return a copy of the request kwargs with cache breakpoints placed"""
+        if not self.enabled:
+            return request_kwargs
+        kwargs = dict(request_kwargs)
+        tools = list(kwargs.get("tools") or [])
+        if tools:
+            tools[-1] = {**tools[-1], "cache_control": EPHEMERAL}
+            kwargs["tools"] = tools
+        if isinstance(kwargs.get("system"), str):
+            kwargs["system"] = [{"type": "text", "text": kwargs["system"], "cache_control": EPHEMERAL}]
+
+        messages = list(kwargs.get("messages") or [])
+        if messages:
+            messages[0] = _mark_last_block(messages[0])
+        if len(messages) > 1:
+            messages[-1] = _mark_last_block(messages[-1])
+        kwargs["messages"] = messages
+        return kwargs
+
+    def record(self, usage):
+        """Record one response's usage; returns the per-iteration counts"""
+        counts = {
+            "cache_read": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "cache_write": getattr(usage, "cache_creation_input_tokens", None) or 0,
+            "input": getattr(usage, "input_tokens", None) or 0
+        }
+        with self._lock:
+            self.requests += 1
+            self.cache_read_tokens += counts["cache_read"]
+            self.cache_write_tokens += counts["cache_write"]
+            self.input_tokens += counts["input"]
+        return counts
+
+    def stats(self):
+        with self._lock:
+            prompt_tokens = self.cache_read_tokens + self.cache_write_tokens + self.input_tokens
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "uncached_input_tokens": self.input_tokens,
+                "cache_read_ratio": self.cache_read_tokens / prompt_tokens if prompt_tokens else None
+            }
+
+
+# Global instance for reuse
+prompt_cache = PromptCache()
+
+
+if __name__ == "__main__":
+    # Fake client with a prefix cache (hit = identical content up to a breakpoint) over a
+    # twelve-iteration screenshot loop, compacted per iteration vs in stable steps
+    import json
+    from types import SimpleNamespace
+    from history_compactor import HistoryCompactor
+
+    def flatten(kwargs):
+        """Request as an ordered list of (serialized block, is_breakpoint)"""
+        blocks = [(tool, "cache_control" in tool) for tool in kwargs["tools"]]
+        blocks += [(block, "cache_control" in block) for block in kwargs["system"]]
+        for message in kwargs["messages"]:
+            content = message["content"]
+            for block in ([{"type": "text", "text": content}] if isinstance(content, str) else content):
+                blocks.append((block, "cache_control" in block))
+        return [(json.dumps({k: v for k, v in block.items() if k != "cache_control"}, sort_keys=True), mark)
+                for block, mark in blocks]
+
+    class FakeMessages:
+        def __init__(self):
+            self.cache = set()
+
+        def create(self, **kwargs):
+            blocks = flatten(kwargs)
+            marks = [index for index, (_, mark) in enumerate(blocks) if mark]
+            assert len(marks) <= 4, marks
+            tokens = lambda end: sum(len(text) for text, _ in blocks[:end]) // 4
+            key = lambda index: hash(tuple(text for text, _ in blocks[:index + 1]))
+            # Like the API: lookups also try the ~20 block boundaries before each breakpoint
+            lookups = {index for mark in marks for index in range(max(0, mark - 20), mark + 1)}
+            hit = max((index for index in lookups if key(index) in self.cache), default=None)
+            read = tokens(hit + 1) if hit is not None else 0
+            written = tokens(marks[-1] + 1) - read if marks and marks[-1] != hit else 0
+            self.cache.update(key(index) for index in marks)
+            return SimpleNamespace(usage=SimpleNamespace(
+                input_tokens=tokens(len(blocks)) - read - written,
+                cache_read_input_tokens=read, cache_creation_input_tokens=written
+            ))
+
+    base = dict(model="fake", system="You are controlling a macOS machine ... " * 40, max_tokens=1024,
+                tools=[{"type": "computer_20250124", "name": "computer"}])
+    screenshot = {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": "A" * 6000}}
+
+    results = {}
+    for label, step in (("per iteration", 1), ("stable steps", config.HISTORY_COMPACT_STEP)):
+        compactor, cache = HistoryCompactor(keep_screenshots=2, compact_step=step), PromptCache(True)
+        client = SimpleNamespace(messages=FakeMessages())
+        history = [{"role": "user", "content": "Open Spotlight and navigate to traderjoes.com ... " * 20}]
+        for step_index in range(12):
+            request = cache.apply({**base, "messages": compactor.compact(history)})
+            cache.record(client.messages.create(**request).usage)
+            history += [
+                {"role": "assistant", "content": [{"type": "tool_use", "id": f"t{step_index}", "name": "computer",
+                                                   "input": {"action": "screenshot"}}]},
+                {"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"t{step_index}",
+                                              "content": [screenshot]}]}
+            ]
+        assert all("cache_control" not in block for msg in history[1:] for block in msg["content"])
+        results[label] = cache.stats()
+        print(f"📊 Compaction {label}: {results[label]['cache_read_tokens']} read, "
+              f"{results[label]['cache_write_tokens']} written, read ratio {results[label]['cache_read_ratio']:.2f}")
+    assert results["stable steps"]["cache_write_tokens"] < results["per iteration"]["cache_write_tokens"]
@@ -0,0 +1,189 @@
+"""
+Refresh Scheduler - Periodic background re-scrapes for dynamic endpoints
+Each scheduled slug has its own refresh interval; the next run is due after
+interval ± jitter so slugs created together don't all hit the desktop pool at
+once. The last good JSON keeps being served while a refresh runs (the file is
+only replaced when a scrape succeeds), and every trigger for a slug that
+already has a queued or running job - scheduled, stale read, or manual
+/refresh-endpoint - is coalesced into that one job, unless it asks for a
+different request text (RefreshConflict).
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import config
+
+
+class RefreshConflict(Exception):
+    """Raised when a slug's in-flight job was queued for a different request text"""
+
+    def __init__(self, slug, job, request_text):
+        super().__init__(f"A refresh of '/{slug}' for a different request is already in flight (job {job.id}).")
+        self.job = job
+        self.request_text = request_text
+
+
+class RefreshScheduler:
+    def __init__(self, submit_job, schedule_file=None, tick=None, jitter=None):
+        self.submit_job = submit_job  # (slug, request_text, capture) -> Job; may raise queue.Full
+        self.schedule_file = schedule_file or config.REFRESH_SCHEDULE_FILE
+        self.tick = tick or config.REFRESH_TICK_SECONDS
+        self.jitter = jitter if jitter is not None else config.REFRESH_JITTER
+        self._schedules = {}  # slug -> {interval, request_text, capture, next_due}
+        self._inflight = {}  # slug -> (most recent Job, its request text)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # save() is called from the tick thread and from requests
+        self._thread = None
+        self._started = False  # The tick thread only runs once start() was called
+        self.triggered = 0
+        self.coalesced = 0
+        self._load()
+
+    def _next_due(self, interval, now=None):
+        return (now or time.time()) + interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def schedule(self, slug, interval, request_text=None, capture=None):
+        """Refresh slug every interval seconds (replaces any existing schedule)"""
+        interval = max(config.REFRESH_MIN_INTERVAL, float(interval))
+        with self._lock:
+            self._schedules[slug] = {
+                "interval": interval,
+                "request_text": request_text,
+                "capture": capture,
+                "next_due": self._next_due(interval)
+            }
+        self.save()
+        self._ensure_thread()
+        return self._schedules[slug]
+
+    def unschedule(self, slug):
+        with self._lock:
+            removed = self._schedules.pop(slug, None)
+        if removed is not None:
+            self.save()
+        return removed is not None
+
+    def interval(self, slug):
+        with self._lock:
+            entry = self._schedules.get(slug)
+            return entry["interval"] if entry else None
+
+    def request_text(self, slug):
+        with self._lock:
+            entry = self._schedules.get(slug)
+            return entry["request_text"] if entry else None
+
+    def in_flight(self, slug):
+        """The queued or running job for slug, if any"""
+        with self._lock:
+            job, _ = self._inflight.get(slug, (None, None))
+            return job if job is not None and job.status in ("queued", "running") else None
+
+    def trigger(self, slug, request_text=None, capture=None):
+        """
+        Queue a refresh for slug unless one is already queued or running
+        Returns (job, coalesced); raises queue.Full from the job queue,
+        ValueError when no request text is known for the slug and RefreshConflict
+        when the in-flight job was queued for a different request_text
+        """
+        with self._lock:
+            job, inflight_request = self._inflight.get(slug, (None, None))
+            if job is not None and job.status in ("queued", "running"):
+                if request_text and request_text != inflight_request:
+                    raise RefreshConflict(slug, job, inflight_request)
+                self.coalesced += 1
+                return job, True
+
+            entry = self._schedules.get(slug) or {}
+            request_text = request_text or entry.get("request_text")
+            capture = capture or entry.get("capture")
+            if not request_text:
+                raise ValueError(f"No request text known for '{slug}'")
+
+            # Submitting under the lock is what makes concurrent triggers coalesce
+            job = self.submit_job(slug, request_text, capture)
+            self._inflight[slug] = (job, request_text)
+            self.triggered += 1
+            if slug in self._schedules:
+                self._schedules[slug]["next_due"] = self._next_due(self._schedules[slug]["interval"])
+        return job, False
+
+    def start(self):
+        """
+        Start refreshing in the background. Not done on import: only the process that
+        serves requests should drive the desktop (not the debug reloader's parent, nor CLI mode)
+        """
+        self._started = True
+        if self._schedules:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if not self._started:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                due = [slug for slug, entry in self._schedules.items() if entry["next_due"] <= now]
+            for slug in due:
+                try:
+                    job, coalesced = self.trigger(slug)
+                    if not coalesced:
+                        print(f"⏰ Scheduled refresh of '/{slug}' queued as job {job.id}")
+                except Exception as e:
+                    # Queue full or no request text - try again after another interval
+                    print(f"⚠️  Scheduled refresh of '/{slug}' not queued: {e}")
+                    with self._lock:
+                        if slug in self._schedules:
+                            self._schedules[slug]["next_due"] = self._next_due(self._schedules[slug]["interval"])
+            time.sleep(self.tick)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "scheduled": {
+                    slug: {
+                        "interval": entry["interval"],
+                        "next_due_in": round(entry["next_due"] - now, 1),
+                        "refreshing": slug in self._inflight and self._inflight[slug][0].status in ("queued", "running")
+                    }
+                    for slug, entry in sorted(self._schedules.items())
+                },
+                "triggered": self.triggered,
+                "coalesced": self.coalesced
+            }
+
+    def _load(self):
+        try:
+            with open(self.schedule_file, "r", encoding="utf-8") as fp:
+                stored = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+        for slug, entry in stored.items():
+            # Restarted processes pick up where the schedule left off, without a thundering herd
+            entry["next_due"] = self._next_due(min(entry["interval"], config.REFRESH_MIN_INTERVAL))
+            self._schedules[slug] = entry
+
+    def save(self):
+        tmp_path = f"{self.schedule_file}.tmp"
+        with self._write_lock:
+            with self._lock:
+                snapshot = {
+                    slug: {key: value for key, value in entry.items() if key != "next_due"}
+                    for slug, entry in self._schedules.items()
+                }
+            try:
+                os.makedirs(os.path.dirname(self.schedule_file), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as fp:
+                    json.dump(snapshot, fp, indent=2)
+                os.replace(tmp_path, self.schedule_file)
+            except OSError as e:
+                print(f"⚠️  Failed to persist refresh schedule: {e}")
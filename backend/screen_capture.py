@@ -0,0 +1,135 @@
+"""
+Screen Capture - Configurable screenshot pipeline for the computer use agent
+Downscales full-resolution captures to a target size, re-encodes them as
+PNG/JPEG/WebP and keeps the coordinate mapping needed to translate the
+model's click/scroll coordinates back onto the real display.
+"""
+
+import math
+import time
+import base64
+from io import BytesIO
+from PIL import Image, ImageGrab
+import config
+
+
+MEDIA_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+def grab_region(bbox=None, point_scale=None):
+    """
+    Grab a region of the local screen given in screen pixels (DISPLAY_WIDTH x DISPLAY_HEIGHT)
+    On macOS ImageGrab's bbox is handed to "screencapture -R", which takes points and returns
+    the region at backing resolution, so the box is converted to points and the pixel box
+    cropped out of the result. Every call still runs one screencapture process there.
+    """
+    if bbox is None:
+        return ImageGrab.grab()
+    scale = point_scale or config.DISPLAY_POINT_SCALE
+    if scale == 1:
+        return ImageGrab.grab(bbox=bbox)
+    left, top, right, bottom = bbox
+    points = (math.floor(left / scale), math.floor(top / scale), math.ceil(right / scale), math.ceil(bottom / scale))
+    region = ImageGrab.grab(bbox=points)
+    expected = (round((points[2] - points[0]) * scale), round((points[3] - points[1]) * scale))
+    if region.size != expected:
+        region = region.resize(expected, Image.BILINEAR)  # Non-Retina capture of a scaled box
+    origin_x, origin_y = round(points[0] * scale), round(points[1] * scale)
+    return region.crop((left - origin_x, top - origin_y, right - origin_x, bottom - origin_y))
+
+
+class ScreenCapture:
+    def __init__(self, screen_width=None, screen_height=None,
+                 target_width=None, image_format=None, quality=None):
+        self.screen_width = screen_width or config.DISPLAY_WIDTH
+        self.screen_height = screen_height or config.DISPLAY_HEIGHT
+        self.image_format = (image_format or config.SCREENSHOT_FORMAT).upper()
+        self.quality = quality or config.SCREENSHOT_QUALITY
+
+        if self.image_format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported screenshot format: {self.image_format}")
+
+        # Never upscale - a target wider than the screen just means "no scaling"
+        target_width = min(target_width or config.SCREENSHOT_TARGET_WIDTH, self.screen_width)
+        self.scale = self.screen_width / target_width
+        self.target_width = target_width
+        self.target_height = round(self.screen_height / self.scale)
+
+    @property
+    def media_type(self):
+        return MEDIA_TYPES[self.image_format]
+
+    @property
+    def target_size(self):
+        """Size of the images the model sees (and the coordinate space it answers in)"""
+        return self.target_width, self.target_height
+
+    def to_screen(self, x, y):
+        """Translate a coordinate from model (scaled) space back to screen space"""
+        return round(x * self.scale), round(y * self.scale)
+
+    def encode(self, image):
+        """Resize and encode a PIL image, returning the raw encoded bytes"""
+        if image.size != self.target_size:
+            image = image.resize(self.target_size, Image.BILINEAR)
+
+        buffer = BytesIO()
+        if self.image_format == "PNG":
+            image.save(buffer, format="PNG", optimize=False)
+        else:
+            # JPEG has no alpha channel; WebP doesn't need it for screenshots
+            image.convert("RGB").save(buffer, format=self.image_format, quality=self.quality)
+        return buffer.getvalue()
+
+    def capture(self, screenshot=None):
+        """Grab the screen (unless a frame is given) and return it base64-encoded in the configured format"""
+        if screenshot is None:
+            screenshot = ImageGrab.grab()
+        return base64.b64encode(self.encode(screenshot)).decode()
+
+    def benchmark(self, image=None, frames=10):
+        """
+        Encode the same frame repeatedly and report the average cost per frame
+        Returns dict with encode_ms and payload_bytes (base64 size sent to the model)
+        """
+        if image is None:
+            image = ImageGrab.grab()
+
+        start_time = time.perf_counter()
+        for _ in range(frames):
+            payload = base64.b64encode(self.encode(image))
+        elapsed = time.perf_counter() - start_time
+
+        return {
+            "format": self.image_format,
+            "quality": self.quality if self.image_format != "PNG" else None,
+            "target_size": self.target_size,
+            "encode_ms": elapsed / frames * 1000,
+            "payload_bytes": len(payload),
+        }
+
+
+# Global instance for reuse
+screen_capture = ScreenCapture()
+
+
+if __name__ == "__main__":
+    # Compare the legacy full-size PNG against the configured pipeline on one live frame
+    frame = ImageGrab.grab()
+    width, height = frame.size
+    candidates = [
+        ScreenCapture(width, height, target_width=width, image_format="PNG"),
+        ScreenCapture(width, height, image_format="PNG"),
+        ScreenCapture(width, height, image_format="JPEG"),
+        ScreenCapture(width, height, image_format="WEBP"),
+    ]
+    print(f"📸 Benchmarking screenshot pipeline on a {width}x{height} frame")
+    for candidate in candidates:
+        stats = candidate.benchmark(frame)
+        size = f"{stats['target_size'][0]}x{stats['target_size'][1]}"
+        print(f"   {stats['format']:<5} {size:>10}  {stats['encode_ms']:8.1f} ms/frame  "
+              f"{stats['payload_bytes'] / 1024:9.1f} KiB/frame")
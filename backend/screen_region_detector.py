@@ -0,0 +1,194 @@
+"""
+Screen Region Detector - Cheap visual checks for UI elements on screen
+Captures only the region of interest, reduces it to a luminance histogram with
+PIL's C-level histogram() (no per-pixel Python loops) and compares it to a
+reusable signature: either a learned reference histogram or a dark-pixel ratio
+rule. Signatures can be saved and reloaded so templates learned once are reused.
+"""
+
+import os
+import json
+import time
+from PIL import Image, ImageDraw, ImageGrab
+import config
+from screen_capture import grab_region
+
+
+class RegionSignature:
+    def __init__(self, name, box, reference=None, max_distance=None,
+                 min_dark_ratio=None, dark_level=100, bins=16):
+        self.name = name
+        self.box = box  # (left, top, right, bottom) as fractions of the screen size
+        self.reference = reference  # Normalized histogram learned from a known-good frame
+        self.max_distance = max_distance if max_distance is not None else config.REGION_MAX_HISTOGRAM_DISTANCE
+        self.min_dark_ratio = min_dark_ratio  # Fallback rule when no reference has been learned
+        self.dark_level = dark_level
+        self.bins = bins
+
+    def pixel_box(self, width, height):
+        left, top, right, bottom = self.box
+        return (round(left * width), round(top * height), round(right * width), round(bottom * height))
+
+    def statistic(self, gray_region):
+        """Return (normalized histogram, dark pixel ratio) for a grayscale region"""
+        counts = gray_region.histogram()  # 256 luminance buckets, computed in C
+        total = sum(counts) or 1
+        step = 256 // self.bins
+        histogram = [sum(counts[i:i + step]) / total for i in range(0, 256, step)]
+        dark_ratio = sum(counts[:self.dark_level]) / total
+        return histogram, dark_ratio
+
+    def matches(self, histogram, dark_ratio):
+        if self.reference is not None:
+            # Total variation distance between the two distributions (0 = identical, 1 = disjoint)
+            distance = sum(abs(a - b) for a, b in zip(histogram, self.reference)) / 2
+            return distance <= self.max_distance
+        return dark_ratio > (self.min_dark_ratio or 0.0)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "box": list(self.box),
+            "reference": self.reference,
+            "max_distance": self.max_distance,
+            "min_dark_ratio": self.min_dark_ratio,
+            "dark_level": self.dark_level,
+            "bins": self.bins
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["name"], tuple(data["box"]), data.get("reference"), data.get("max_distance"),
+            data.get("min_dark_ratio"), data.get("dark_level", 100), data.get("bins", 16)
+        )
+
+
+def _spotlight_signature(width, height):
+    # Same 400x150 box around the center-top quarter the original detector sampled
+    center_x, top_y = width / 2, height / 4
+    box = ((center_x - 200) / width, (top_y - 50) / height, (center_x + 200) / width, (top_y + 100) / height)
+    return RegionSignature("spotlight", box, min_dark_ratio=0.3)
+
+
+class ScreenRegionDetector:
+    def __init__(self, screen_width=None, screen_height=None, signatures_file=None):
+        self.screen_width = screen_width or config.DISPLAY_WIDTH
+        self.screen_height = screen_height or config.DISPLAY_HEIGHT
+        self.signatures_file = signatures_file or config.REGION_SIGNATURES_FILE
+        self.signatures = {}
+        self.register(_spotlight_signature(self.screen_width, self.screen_height))
+        self.load()
+
+    def register(self, signature):
+        self.signatures[signature.name] = signature
+
+    def _region(self, signature, frame=None):
+        """Grayscale image of the signature's region - grabbed directly unless a frame is given"""
+        if frame is not None:
+            region = frame.crop(signature.pixel_box(*frame.size))
+        else:
+            region = grab_region(signature.pixel_box(self.screen_width, self.screen_height))
+        return region.convert('L')
+
+    def detect(self, name, frame=None):
+        """Return True if the named signature is currently visible"""
+        signature = self.signatures[name]
+        histogram, dark_ratio = signature.statistic(self._region(signature, frame))
+        return signature.matches(histogram, dark_ratio)
+
+    def learn(self, name, frame=None, box=None, max_distance=None):
+        """Record the current look of a region as the reference template for a signature"""
+        signature = self.signatures.get(name) or RegionSignature(name, box)
+        if box is not None:
+            signature.box = box
+        if max_distance is not None:
+            signature.max_distance = max_distance
+        signature.reference, _ = signature.statistic(self._region(signature, frame))
+        self.register(signature)
+        self.save()
+        return signature
+
+    def load(self):
+        try:
+            with open(self.signatures_file, "r", encoding="utf-8") as fp:
+                stored = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+        for data in stored:
+            self.register(RegionSignature.from_dict(data))
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.signatures_file), exist_ok=True)
+            with open(self.signatures_file, "w", encoding="utf-8") as fp:
+                json.dump([signature.to_dict() for signature in self.signatures.values()], fp, indent=2)
+        except OSError as e:
+            print(f"⚠️  Failed to save region signatures: {e}")
+
+
+# Global instance for reuse
+screen_region_detector = ScreenRegionDetector()
+
+
+def _legacy_dark_ratio_check(frame):
+    # The original implementation: full frame, crop, per-pixel Python generator
+    width, height = frame.size
+    center_x, top_y = width // 2, height // 4
+    gray = frame.crop((center_x - 200, top_y - 50, center_x + 200, top_y + 100)).convert('L')
+    pixels = list(gray.getdata())
+    return sum(1 for p in pixels if p < 100) / len(pixels) > 0.3
+
+
+def benchmark(width=None, height=None, ticks=200, capture_ticks=20):
+    """
+    Time legacy vs histogram detection per polling tick on synthetic frames (one with a
+    dark Spotlight-like box, one without), then the capture each tick pays on the live
+    screen: full grab + crop (legacy) vs region-only grab. On macOS every ImageGrab call
+    runs a screencapture process, so capture dominates a tick there; capture results are
+    None when no screen can be grabbed.
+    """
+    width = width or config.DISPLAY_WIDTH
+    height = height or config.DISPLAY_HEIGHT
+    signature = _spotlight_signature(width, height)
+    pixel_box = signature.pixel_box(width, height)
+
+    def histogram_check(frame):
+        return signature.matches(*signature.statistic(frame.crop(pixel_box).convert('L')))
+
+    open_frame = Image.new("RGB", (width, height), (235, 235, 235))
+    ImageDraw.Draw(open_frame).rectangle(
+        (width // 2 - 340, height // 4 - 40, width // 2 + 340, height // 4 + 40), fill=(40, 40, 45)
+    )
+    closed_frame = Image.new("RGB", (width, height), (235, 235, 235))
+
+    results = {}
+    for label, check in (("legacy", _legacy_dark_ratio_check),
+                         ("histogram", histogram_check)):
+        assert check(open_frame) and not check(closed_frame)
+        start_time = time.perf_counter()
+        for tick in range(ticks):
+            check(open_frame if tick % 2 else closed_frame)
+        results[f"{label}_ms_per_tick"] = (time.perf_counter() - start_time) / ticks * 1000
+
+    for label, grab in (("full_grab_crop", lambda: ImageGrab.grab().crop(pixel_box)),
+                        ("region_grab", lambda: grab_region(pixel_box))):
+        try:
+            grab()  # Warm-up, and the check that a screen is available at all
+            start_time = time.perf_counter()
+            for _ in range(capture_ticks):
+                grab()
+            results[f"{label}_ms_per_tick"] = (time.perf_counter() - start_time) / capture_ticks * 1000
+        except Exception:
+            results[f"{label}_ms_per_tick"] = None
+    return results
+
+
+if __name__ == "__main__":
+    stats = benchmark()
+    print("🔍 Spotlight region detection benchmark")
+    print(f"   legacy getdata() loop: {stats['legacy_ms_per_tick']:.3f} ms/tick (synthetic frame, no capture)")
+    print(f"   histogram signature:   {stats['histogram_ms_per_tick']:.3f} ms/tick (synthetic frame, no capture)")
+    for label, key in (("full grab + crop", "full_grab_crop_ms_per_tick"), ("region grab", "region_grab_ms_per_tick")):
+        value = stats[key]
+        print(f"   capture, {label + ':':<17} " + (f"{value:.3f} ms/tick" if value is not None else "n/a (no screen)"))
@@ -0,0 +1,84 @@
+"""
+Screen Waiter - Event-driven replacement for fixed sleeps
+Polls cheap, downscaled grayscale captures of the screen (or a region of it)
+and returns as soon as the picture changes or settles, with a timeout as the
+worst case. Fast page loads no longer pay the full fixed delay.
+"""
+
+import time
+from PIL import Image, ImageChops, ImageStat
+import config
+from screen_capture import grab_region
+
+
+class ScreenWaiter:
+    def __init__(self, interval=None, threshold=None, thumb_width=None):
+        self.interval = interval or config.WAIT_POLL_INTERVAL
+        self.threshold = threshold or config.WAIT_DIFF_THRESHOLD  # Mean abs luminance diff (0-255)
+        self.thumb_width = thumb_width or config.WAIT_THUMB_WIDTH
+
+    def thumbnail(self, bbox=None, grab=None):
+        """Downscaled grayscale capture of the screen (or region) used for cheap comparisons"""
+        if grab is None:
+            frame = grab_region(bbox)
+        else:
+            frame = grab()
+            if bbox is not None:
+                frame = frame.crop(bbox)
+        height = max(1, round(frame.height * self.thumb_width / frame.width))
+        return frame.convert('L').resize((self.thumb_width, height), Image.BILINEAR)
+
+    @staticmethod
+    def diff(a, b):
+        """Mean absolute luminance difference (0-255) between two same-sized thumbnails"""
+        return ImageStat.Stat(ImageChops.difference(a, b)).mean[0]
+
+    def wait_for_change(self, timeout, bbox=None, grab=None):
+        """
+        Block until the region differs from how it looked on entry, or timeout
+        Returns dict: changed, elapsed, frames
+        """
+        start_time = time.perf_counter()
+        baseline = self.thumbnail(bbox, grab)
+        frames = 1
+        while time.perf_counter() - start_time < timeout:
+            time.sleep(self.interval)
+            frames += 1
+            if self.diff(baseline, self.thumbnail(bbox, grab)) > self.threshold:
+                return {"changed": True, "elapsed": time.perf_counter() - start_time, "frames": frames}
+        return {"changed": False, "elapsed": time.perf_counter() - start_time, "frames": frames}
+
+    def wait_for_stable(self, timeout, bbox=None, grab=None, stable_frames=None):
+        """
+        Block until consecutive captures stop changing (e.g. a page finished rendering), or timeout
+        Returns dict: stable, elapsed, frames
+        """
+        stable_frames = stable_frames or config.WAIT_STABLE_FRAMES
+        start_time = time.perf_counter()
+        previous = self.thumbnail(bbox, grab)
+        frames, quiet = 1, 0
+        while time.perf_counter() - start_time < timeout:
+            time.sleep(self.interval)
+            current = self.thumbnail(bbox, grab)
+            frames += 1
+            quiet = quiet + 1 if self.diff(previous, current) <= self.threshold else 0
+            if quiet >= stable_frames:
+                return {"stable": True, "elapsed": time.perf_counter() - start_time, "frames": frames}
+            previous = current
+        return {"stable": False, "elapsed": time.perf_counter() - start_time, "frames": frames}
+
+    def wait_for_load(self, timeout, bbox=None, grab=None):
+        """Wait for something to start changing, then for it to settle - all within one timeout"""
+        start_time = time.perf_counter()
+        change = self.wait_for_change(timeout, bbox, grab)
+        remaining = max(0.0, timeout - (time.perf_counter() - start_time))
+        settle = self.wait_for_stable(remaining, bbox, grab) if change["changed"] else {"stable": False}
+        return {
+            "changed": change["changed"],
+            "stable": settle["stable"],
+            "elapsed": time.perf_counter() - start_time
+        }
+
+
+# Global instance for reuse
+screen_waiter = ScreenWaiter()
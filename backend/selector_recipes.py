@@ -0,0 +1,348 @@
+"""
+Selector Recipes - Deterministic per-slug extraction learned from a successful LLM run
+After the model has turned a (reduced) page into records, a recipe is derived
+that reproduces those records with plain selectors: one item selector such as
+"li.ProductCard" plus, per field, "<tag>[.<class>]" + occurrence index + source
+(text or an attribute) + a small value transform. Refreshes apply the recipe
+locally in milliseconds and only go back to the model when the result fails
+validation (too few items, or required fields coming back empty).
+
+Selectors use the CSS subset "tag" / "tag.class"; the reducer keeps the first
+class token of every element so the same recipe works on every refresh.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from html.parser import HTMLParser
+import config
+from html_extractor import find_boundary
+from html_reducer import VOID_TAGS
+
+
+WHITESPACE = re.compile(r'\s+')
+NUMBER = re.compile(r'-?\d+(?:[.,]\d+)?')
+
+
+class _Node:
+    __slots__ = ("tag", "cls", "attrs", "children", "parts")
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        attrs = dict(attrs)
+        self.cls = (attrs.get("class") or "").split()[0] if attrs.get("class") else None
+        self.attrs = attrs
+        self.children = []
+        self.parts = []  # Text and child nodes in document order
+
+    def text(self):
+        pieces = []
+        for part in self.parts:
+            pieces.append(part if isinstance(part, str) else part.text())
+        return WHITESPACE.sub(' ', " ".join(pieces)).strip()
+
+    def descendants(self):
+        for child in self.children:
+            yield child
+            yield from child.descendants()
+
+    def matches(self, selector):
+        tag, _, cls = selector.partition('.')
+        return self.tag == tag and (not cls or self.cls == cls)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#document", [])
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, attrs)
+        self.stack[-1].children.append(node)
+        self.stack[-1].parts.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        node = _Node(tag, attrs)
+        self.stack[-1].children.append(node)
+        self.stack[-1].parts.append(node)
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed elements: pop back to the nearest matching open tag
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].parts.append(data)
+
+
+def parse_tree(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def select(root, selector):
+    """All descendants matching "tag" or "tag.class", in document order"""
+    return [node for node in root.descendants() if node.matches(selector)]
+
+
+def _normalize(value):
+    return WHITESPACE.sub(' ', str(value)).strip()
+
+
+def _transform(raw, transform):
+    if raw is None:
+        return None
+    raw = _normalize(raw)
+    if transform == "compact":
+        return raw.replace(' ', '')
+    if transform == "number":
+        found = NUMBER.search(raw)
+        return float(found.group().replace(',', '.')) if found else None
+    return raw
+
+
+def _same(got, wanted):
+    if isinstance(wanted, (int, float)) and not isinstance(wanted, bool):
+        return got == float(wanted)
+    return got == _normalize(wanted)
+
+
+def _read(node, rule):
+    """Value of one field rule inside an item node (None when the element is missing)"""
+    candidates = [n for n in [node, *node.descendants()] if n.matches(rule["selector"])]
+    if rule["nth"] >= len(candidates):
+        return None
+    target = candidates[rule["nth"]]
+    raw = target.text() if rule["source"] == "text" else target.attrs.get(rule["source"])
+    value = _transform(raw, rule["transform"])
+    if value is not None and rule.get("prefix"):
+        value = rule["prefix"] + value
+    return value
+
+
+def _candidate_rules(item, value):
+    """Every (selector, nth, source, transform, prefix) inside item that yields value"""
+    wanted = _normalize(value) if value is not None else ""
+    if not wanted:
+        return []
+    rules, seen = [], {}
+    for node in [item, *item.descendants()]:
+        # Class-qualified selectors first: they survive layout changes better than bare tags
+        for selector in ([f"{node.tag}.{node.cls}"] if node.cls else []) + [node.tag]:
+            nth = seen.get(selector, 0)
+            seen[selector] = nth + 1
+            sources = [("text", node.text())] + [(name, v) for name, v in node.attrs.items() if name != "class"]
+            for source, raw in sources:
+                if not raw:
+                    continue
+                raw = _normalize(raw)
+                base = {"selector": selector, "nth": nth, "source": source}
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if _transform(raw, "number") == float(value):
+                        rules.append({**base, "transform": "number", "prefix": ""})
+                elif raw == wanted:
+                    rules.append({**base, "transform": "text", "prefix": ""})
+                elif raw.replace(' ', '') == wanted.replace(' ', '') and ' ' not in wanted:
+                    rules.append({**base, "transform": "compact", "prefix": ""})
+                elif source != "text" and wanted.endswith(raw):
+                    # Relative href/src that the model made absolute
+                    rules.append({**base, "transform": "text", "prefix": wanted[:-len(raw)]})
+    return rules
+
+
+class SelectorRecipe:
+    def __init__(self, item_selector, fields, expected_items, request_text=None, website=None, created_at=None):
+        self.item_selector = item_selector
+        self.fields = fields  # field name -> rule dict
+        self.expected_items = expected_items
+        self.request_text = request_text
+        self.website = website
+        self.created_at = created_at or time.time()
+
+    def apply(self, html):
+        """Return (records, report) - report["valid"] tells whether the result can be trusted"""
+        start_time = time.perf_counter()
+        records = []
+        for item in select(parse_tree(html), self.item_selector):
+            record = {name: _read(item, rule) for name, rule in self.fields.items()}
+            if any(value not in (None, "") for value in record.values()):
+                records.append(record)
+        valid, reason = self.validate(records)
+        report = {
+            "recipe": self.item_selector,
+            "records": len(records),
+            "valid": valid,
+            "reason": reason,
+            "ms": round((time.perf_counter() - start_time) * 1000, 1)
+        }
+        return records, report
+
+    def validate(self, records):
+        minimum = max(config.RECIPE_MIN_ITEMS, int(self.expected_items * config.RECIPE_MIN_COUNT_RATIO))
+        if len(records) < minimum:
+            return False, f"{len(records)} items, expected at least {minimum}"
+        for name in self.fields:
+            filled = sum(1 for record in records if record.get(name) not in (None, ""))
+            if filled / len(records) < config.RECIPE_MIN_FILL:
+                return False, f"field '{name}' filled in only {filled}/{len(records)} items"
+        return True, None
+
+    def to_dict(self):
+        return {
+            "item_selector": self.item_selector,
+            "fields": self.fields,
+            "expected_items": self.expected_items,
+            "request_text": self.request_text,
+            "website": self.website,
+            "created_at": self.created_at
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["item_selector"], data["fields"], data["expected_items"],
+                   data.get("request_text"), data.get("website"), data.get("created_at"))
+
+
+def derive_recipe(html, records, request_text=None, website=None):
+    """
+    Learn a recipe that reproduces records from html, or None when no item
+    boundary exists or some field cannot be located consistently
+    """
+    if not records:
+        return None
+    boundary = find_boundary(html)
+    if boundary is None:
+        return None
+    item_selector = f"{boundary[0]}.{boundary[1].split()[0]}"
+    items = select(parse_tree(html), item_selector)
+
+    # Pair each record with the item that contains its product_url (page order as a fallback)
+    pairs = []
+    for record in records:
+        url = _normalize(record.get("product_url") or "")
+        item = next((item for item in items if url and any(
+            url.endswith(_normalize(n.attrs["href"])) for n in [item, *item.descendants()] if n.attrs.get("href")
+        )), None)
+        if item is not None:
+            pairs.append((item, record))
+    if not pairs and len(items) == len(records):
+        pairs = list(zip(items, records))
+    if len(pairs) < max(config.RECIPE_MIN_ITEMS, len(records) * config.RECIPE_MIN_FILL):
+        return None
+
+    fields = {}
+    # Only fields with a paired sample can be located; one filled only in unmatched records is skipped
+    field_names = [name for name in records[0] if any(r.get(name) not in (None, "") for _, r in pairs)]
+    for name in field_names:
+        sample_item, sample_record = next(((i, r) for i, r in pairs if r.get(name) not in (None, "")), (None, None))
+        best, best_hits = None, 0
+        for rule in _candidate_rules(sample_item, sample_record[name]):
+            hits = sum(1 for item, record in pairs
+                       if record.get(name) not in (None, "") and _same(_read(item, rule), record[name]))
+            if hits > best_hits:
+                best, best_hits = rule, hits
+        wanted = sum(1 for _, record in pairs if record.get(name) not in (None, ""))
+        if best is None or best_hits / wanted < config.RECIPE_MIN_FILL:
+            print(f"🧪 No consistent selector for field '{name}' ({best_hits}/{wanted} matches)")
+            return None
+        fields[name] = best
+
+    return SelectorRecipe(item_selector, fields, len(records), request_text, website)
+
+
+class RecipeStore:
+    def __init__(self, store_file=None):
+        self.store_file = store_file or config.RECIPE_STORE_FILE
+        self._recipes = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Concurrent saves would interleave on the .tmp file
+        self.hits = 0
+        self.fallbacks = 0
+        self._load()
+
+    def get(self, slug):
+        with self._lock:
+            return self._recipes.get(slug)
+
+    def put(self, slug, recipe):
+        with self._lock:
+            self._recipes[slug] = recipe
+        self.save()
+
+    def invalidate(self, slug):
+        with self._lock:
+            removed = self._recipes.pop(slug, None)
+        if removed is not None:
+            self.save()
+
+    def record_outcome(self, valid):
+        with self._lock:
+            if valid:
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+
+    def stats(self):
+        with self._lock:
+            return {"recipes": sorted(self._recipes), "hits": self.hits, "fallbacks": self.fallbacks}
+
+    def _load(self):
+        try:
+            with open(self.store_file, "r", encoding="utf-8") as fp:
+                stored = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+        self._recipes = {slug: SelectorRecipe.from_dict(data) for slug, data in stored.items()}
+
+    def save(self):
+        tmp_path = f"{self.store_file}.tmp"
+        with self._write_lock:
+            with self._lock:
+                snapshot = {slug: recipe.to_dict() for slug, recipe in self._recipes.items()}
+            try:
+                os.makedirs(os.path.dirname(self.store_file), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as fp:
+                    json.dump(snapshot, fp, indent=2)
+                os.replace(tmp_path, self.store_file)
+            except OSError as e:
+                print(f"⚠️  Failed to persist selector recipes: {e}")
+
+
+# Global instance for reuse
+recipe_store = RecipeStore()
+
+
+if __name__ == "__main__":
+    # Learn a recipe from "model output" for one page, then apply it to a changed page
+    def page(count, offset=0):
+        return ("<html><body><ul>" + "".join(
+            f'<li class="ProductCard"><a class="Link" href="/p/{i}">Product {i}</a>'
+            f'<img src="/img/{i}.jpg" alt="Product {i}"><span class="Price">$ {i}.99</span></li>'
+            for i in range(offset, offset + count)) + "</ul></body></html>")
+
+    llm_records = [{"product_name": f"Product {i}", "price": f"${i}.99",
+                    "product_url": f"https://www.traderjoes.com/p/{i}",
+                    "image_url": f"https://www.traderjoes.com/img/{i}.jpg"} for i in range(120)]
+    recipe = derive_recipe(page(120), llm_records)
+    print(json.dumps(recipe.to_dict()["fields"], indent=2))
+
+    records, report = recipe.apply(page(130, offset=5))
+    print(f"🧪 Refresh via recipe: {report}")
+    print(f"   first record: {records[0]}")
+    _, broken = recipe.apply("<html><body><div>Redesigned page</div></body></html>")
+    print(f"🧪 Redesigned page: {broken}")
+
+    # A field filled only in a record that matches no item on the page is skipped, not fatal
+    unpaired = {"product_name": "Gift Card", "price": None, "product_url": "https://www.traderjoes.com/gift",
+                "image_url": None, "badge": "New"}
+    recipe = derive_recipe(page(20), [{**record, "badge": None} for record in llm_records[:20]] + [unpaired])
+    print(f"🧪 With an unpaired record: fields {sorted(recipe.fields)}")
@@ -6,9 +6,11 @@ and adapting timing based on system responsiveness.
 
 import time
 import pyautogui
-import subprocess
-from PIL import ImageGrab
 import config
+from screen_region_detector import screen_region_detector
+from ui_detector import ui_detector
+from screen_waiter import screen_waiter
+from timing_model import timing_model
 
 
 class SpotlightOptimizer:
@@ -18,33 +20,12 @@ class SpotlightOptimizer:
         
     def detect_spotlight_open(self):
         """
-        Detect if Spotlight is currently open using system commands
+        Detect if Spotlight is currently open by asking the persistent UI detector worker
         Returns True if Spotlight is visible, False otherwise
         """
         try:
-            # Use AppleScript to check if Spotlight is visible
-            applescript = '''
-            tell application "System Events"
-                try
-                    if exists window "Spotlight" of application process "Spotlight" then
-                        return true
-                    else
-                        return false
-                    end if
-                on error
-                    return false
-                end try
-            end tell
-            '''
-            
-            result = subprocess.run(
-                ['osascript', '-e', applescript], 
-                capture_output=True, 
-                text=True, 
-                timeout=0.5
-            )
-            
-            return result.stdout.strip().lower() == 'true'
+            # One long-lived osascript process answers every poll - no fork per check
+            return ui_detector.is_visible("Spotlight", "Spotlight")
             
         except Exception:
             # Fallback: use screenshot analysis
@@ -52,36 +33,12 @@ class SpotlightOptimizer:
     
     def _detect_spotlight_via_screenshot(self):
         """
-        Fallback method: detect Spotlight by analyzing screenshot
+        Fallback method: detect Spotlight by analyzing the screen region where it appears
         Returns True if Spotlight appears to be open
         """
         try:
-            # Take a quick screenshot of the center area where Spotlight appears
-            screenshot = ImageGrab.grab()
-            
-            # Spotlight typically appears in the center-top area
-            # Look for the characteristic dark search box
-            width, height = screenshot.size
-            center_x = width // 2
-            top_y = height // 4
-            
-            # Sample a small area around where Spotlight should be
-            search_area = screenshot.crop((
-                center_x - 200, top_y - 50,
-                center_x + 200, top_y + 100
-            ))
-            
-            # Convert to grayscale and check for dark regions (Spotlight's search box)
-            gray = search_area.convert('L')
-            pixels = list(gray.getdata())
-            
-            # Count dark pixels (likely Spotlight background)
-            dark_pixels = sum(1 for p in pixels if p < 100)
-            dark_ratio = dark_pixels / len(pixels)
-            
-            # If more than 30% of the area is dark, Spotlight is likely open
-            return dark_ratio > 0.3
-            
+            # Only the search-box region is captured and reduced to a histogram
+            return screen_region_detector.detect("spotlight")
         except Exception:
             return False
     
@@ -108,15 +65,16 @@ class SpotlightOptimizer:
             time.sleep(0.02)
             pyautogui.keyUp('command')
             
-            # Initial quick wait
-            time.sleep(config.SPOTLIGHT_INITIAL_WAIT)
+            # Initial wait - returns as soon as the search box region changes
+            # (bounded by the median observed opening time once enough samples exist)
+            initial_wait = self.get_optimized_wait_time(config.SPOTLIGHT_INITIAL_WAIT, pct=50)
+            screen_waiter.wait_for_change(initial_wait, self.spotlight_bbox())
             
             # Dynamic detection loop
-            max_wait_time = config.SPOTLIGHT_MAX_WAIT
+            max_wait_time = self.get_optimized_wait_time(config.SPOTLIGHT_MAX_WAIT)
             check_interval = config.SPOTLIGHT_CHECK_INTERVAL
-            elapsed = config.SPOTLIGHT_INITIAL_WAIT
             
-            while elapsed < max_wait_time:
+            while time.time() - start_time < max_wait_time:
                 if self.detect_spotlight_open():
                     time_taken = time.time() - start_time
                     print(f"✅ Spotlight opened in {time_taken:.3f}s")
@@ -126,7 +84,6 @@ class SpotlightOptimizer:
                     return True, time_taken
                 
                 time.sleep(check_interval)
-                elapsed += check_interval
             
             # If detection failed, try one more time with different method
             print("🔄 First attempt timed out, trying alternative method...")
@@ -136,6 +93,10 @@ class SpotlightOptimizer:
             print(f"❌ Error in optimized Spotlight opening: {e}")
             return self._fallback_spotlight_open(start_time)
     
+    def spotlight_bbox(self):
+        """Screen box where the Spotlight search field appears"""
+        return screen_region_detector.signatures["spotlight"].pixel_box(config.DISPLAY_WIDTH, config.DISPLAY_HEIGHT)
+
     def _fallback_spotlight_open(self, start_time):
         """
         Fallback method using traditional approach
@@ -143,12 +104,13 @@ class SpotlightOptimizer:
         try:
             # Try the traditional hotkey method
             pyautogui.hotkey('command', 'space')
-            time.sleep(config.SPOTLIGHT_FALLBACK_WAIT)
+            screen_waiter.wait_for_change(self.get_optimized_wait_time(config.SPOTLIGHT_FALLBACK_WAIT), self.spotlight_bbox())
             
             # Check if it worked
             if self.detect_spotlight_open():
                 time_taken = time.time() - start_time
                 print(f"✅ Spotlight opened (fallback) in {time_taken:.3f}s")
+                self._update_system_speed(time_taken)
                 return True, time_taken
             else:
                 print("❌ Spotlight failed to open even with fallback method")
@@ -163,6 +125,7 @@ class SpotlightOptimizer:
         Update system speed estimate based on how quickly Spotlight opened
         """
         self.last_spotlight_time = time_taken
+        timing_model.record("spotlight_open", time_taken)
         
         if time_taken < config.FAST_SYSTEM_THRESHOLD:
             # System is fast, reduce future wait times
@@ -173,11 +136,12 @@ class SpotlightOptimizer:
             self.system_speed = max(0.5, self.system_speed * 0.9)
             print(f"📉 System speed decreased to {self.system_speed:.2f}x")
     
-    def get_optimized_wait_time(self, base_time):
+    def get_optimized_wait_time(self, base_time, action="spotlight_open", pct=95, site=None):
         """
-        Get an optimized wait time based on system speed
+        Get an optimized wait time from observed latencies for the action
+        Falls back to the base time scaled by system speed until enough samples exist
         """
-        return base_time / self.system_speed
+        return timing_model.wait_for(action, base_time / self.system_speed, site=site, pct=pct)
     
     def clear_spotlight_if_open(self):
         """
@@ -0,0 +1,126 @@
+"""
+Stream Replay - Check the streaming agent turn against the blocking one offline
+A recorded Messages API turn (data/recorded_agent_turn.json, raw stream events)
+is served by a local stub: as server-sent events to streaming requests and as
+the accumulated message to blocking ones. Running both _run_turn_streaming and
+_run_turn_blocking against it must give identical assistant content and
+tool_results - the streaming path only changes *when* tools start.
+
+    python stream_replay.py
+"""
+
+import os
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+RECORDED_TURN_FILE = os.path.join(os.path.dirname(__file__), "data", "recorded_agent_turn.json")
+EVENT_DELAY = 0.02  # Seconds between replayed events, so dispatch timing is visible
+
+
+def load_recorded_turn(path=None):
+    with open(path or RECORDED_TURN_FILE, "r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def final_message(events):
+    """Accumulate recorded stream events into the message a blocking request returns"""
+    message, partial_json = None, {}
+    for event in events:
+        if event["type"] == "message_start":
+            message = json.loads(json.dumps(event["message"]))
+        elif event["type"] == "content_block_start":
+            message["content"].append(dict(event["content_block"]))
+        elif event["type"] == "content_block_delta":
+            block, delta = message["content"][event["index"]], event["delta"]
+            if delta["type"] == "text_delta":
+                block["text"] += delta["text"]
+            elif delta["type"] == "input_json_delta":
+                partial_json[event["index"]] = partial_json.get(event["index"], "") + delta["partial_json"]
+        elif event["type"] == "content_block_stop" and event["index"] in partial_json:
+            message["content"][event["index"]]["input"] = json.loads(partial_json[event["index"]])
+        elif event["type"] == "message_delta":
+            message.update(event["delta"])
+            message["usage"].update(event["usage"])
+    return message
+
+
+class RecordedTurnServer:
+    """Local stub of the Messages API that answers every request with the recorded turn"""
+
+    def __init__(self, events, event_delay=EVENT_DELAY):
+        recorded, message = events, final_message(events)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for event in recorded:
+                        self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                        time.sleep(event_delay)
+                    self.close_connection = True
+                    return
+                payload = json.dumps(message).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+
+
+if __name__ == "__main__":
+    from app import WebsiteNavigatorAgent
+    from client_registry import client_registry
+
+    events = load_recorded_turn()
+    request_kwargs = dict(
+        model="recorded", max_tokens=1024, betas=["computer-use-2025-01-24"],
+        messages=[{"role": "user", "content": "Open github.com"}],
+        tools=[{"type": "computer_20250124", "name": "computer", "display_width_px": 1280, "display_height_px": 832}]
+    )
+
+    with RecordedTurnServer(events) as server:
+        runs = {}
+        for mode in ("blocking", "streaming"):
+            agent = WebsiteNavigatorAgent()
+            agent.client = client_registry.get(api_key="recorded", base_url=server.base_url)
+            executed = []
+            # Deterministic stand-in for the desktop: record the order, echo the action
+            agent.execute_computer_tool = lambda tool_input, executed=executed: (
+                executed.append(tool_input["action"]) or f"replayed {tool_input['action']}"
+            )
+            run_turn = agent._run_turn_streaming if mode == "streaming" else agent._run_turn_blocking
+            start_time = time.perf_counter()
+            content, tool_results, first_action_ms, usage = run_turn(request_kwargs)
+            total_ms = (time.perf_counter() - start_time) * 1000
+            content = [block.model_dump(exclude_none=True) for block in content]
+            runs[mode] = (content, tool_results, executed, usage.output_tokens)
+            print(f"🎬 {mode}: first action after {first_action_ms:.0f} ms, turn done after {total_ms:.0f} ms, "
+                  f"tools {executed}")
+
+    assert runs["streaming"] == runs["blocking"], "streaming and blocking turns differ"
+    assert runs["streaming"][0] == final_message(events)["content"]
+    print(f"✅ Identical content ({len(runs['streaming'][0])} blocks) and tool_results ({len(runs['streaming'][1])})")
+    client_registry.close()
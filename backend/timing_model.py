@@ -0,0 +1,126 @@
+"""
+Timing Model - Observed latencies per action type (and per site) driving every wait
+Keeps a rolling window of recent durations for actions like Spotlight opening,
+page loads and clipboard readiness, persists them to a small JSON store, and
+derives wait budgets from rolling percentiles instead of fixed config constants.
+Until enough samples exist, callers get their configured default back. Waits
+that run out are recorded too, so a budget that shrank too far grows back.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+import config
+
+
+def _percentile(sorted_values, pct):
+    # Nearest-rank on a pre-sorted list
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class TimingModel:
+    def __init__(self, store_file=None, window=None, min_samples=None):
+        self.store_file = store_file or config.TIMING_STORE_FILE
+        self.window = window or config.TIMING_WINDOW
+        self.min_samples = min_samples or config.TIMING_MIN_SAMPLES
+        self._samples = {}  # "action" or "action@site" -> deque of seconds
+        self._missed = set()  # Keys whose last wait ran out; budgeted at least the default until one succeeds
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Held by save() from snapshot to rename
+        self._dirty = 0
+        self._last_save = 0.0
+        self._load()
+
+    @staticmethod
+    def _keys(action, site=None):
+        return [action, f"{action}@{site}"] if site else [action]
+
+    def record(self, action, seconds, site=None, timed_out=False):
+        """Record one observed duration (seconds) for an action, optionally for a specific site"""
+        with self._lock:
+            for key in self._keys(action, site):
+                self._samples.setdefault(key, deque(maxlen=self.window)).append(round(seconds, 4))
+                if timed_out:
+                    self._missed.add(key)
+                else:
+                    self._missed.discard(key)
+            self._dirty += 1
+            should_save = self._dirty >= config.TIMING_SAVE_EVERY or time.time() - self._last_save > 30
+        if should_save:
+            self.save()
+
+    def record_timeout(self, action, budget, site=None):
+        """Record a wait that ran out its budget; counted past the budget so the learned one grows"""
+        self.record(action, budget * config.TIMING_SAFETY_MARGIN, site, timed_out=True)
+
+    def percentile(self, action, pct, site=None):
+        """Rolling percentile in seconds - per site when it has enough samples, else per action"""
+        with self._lock:
+            for key in reversed(self._keys(action, site)):
+                samples = self._samples.get(key)
+                if samples and len(samples) >= self.min_samples:
+                    return _percentile(sorted(samples), pct)
+        return None
+
+    def wait_for(self, action, default, site=None, pct=95, floor=None):
+        """
+        Wait budget for an action: the pct-th percentile plus a safety margin,
+        clamped to [floor or TIMING_MIN_WAIT, default * TIMING_MAX_FACTOR]; default until data exists
+        Pass floor=default where running out early gives a wrong result rather than a slower one
+        Right after a timeout the budget is at least default again
+        """
+        observed = self.percentile(action, pct, site)
+        if observed is None:
+            return default
+        with self._lock:
+            if self._missed.intersection(self._keys(action, site)):
+                floor = max(floor or 0, default)
+        budget = observed * config.TIMING_SAFETY_MARGIN
+        return max(floor or config.TIMING_MIN_WAIT, min(budget, default * config.TIMING_MAX_FACTOR))
+
+    def stats(self):
+        with self._lock:
+            snapshot = {key: sorted(samples) for key, samples in self._samples.items()}
+        return {
+            key: {
+                "samples": len(values),
+                "p50": _percentile(values, 50),
+                "p90": _percentile(values, 90),
+                "p95": _percentile(values, 95),
+                "max": values[-1] if values else None
+            }
+            for key, values in sorted(snapshot.items())
+        }
+
+    def _load(self):
+        try:
+            with open(self.store_file, "r", encoding="utf-8") as fp:
+                stored = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return
+        for key, values in stored.items():
+            self._samples[key] = deque(values, maxlen=self.window)
+
+    def save(self):
+        tmp_path = f"{self.store_file}.tmp"
+        with self._write_lock:
+            with self._lock:
+                snapshot = {key: list(samples) for key, samples in self._samples.items()}
+                self._dirty = 0
+                self._last_save = time.time()
+            try:
+                os.makedirs(os.path.dirname(self.store_file), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as fp:
+                    json.dump(snapshot, fp)
+                os.replace(tmp_path, self.store_file)
+            except OSError as e:
+                print(f"⚠️  Failed to persist timing model: {e}")
+
+
+# Global instance for reuse
+timing_model = TimingModel()
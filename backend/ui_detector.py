@@ -0,0 +1,171 @@
+"""
+UI Detector - Long-lived worker process that answers "is UI element X visible"
+Spawning osascript for every Spotlight poll costs far more than the check itself.
+Instead one worker process is started once and queried over a line-based pipe
+protocol:
+
+    visible\t<process>\t<window>\n  ->  1\n | 0\n
+    ping\n                          ->  pong\n
+
+Backends: "jxa" runs a JavaScript for Automation loop inside a single osascript
+process (macOS); "standin" is a tiny local Python worker speaking the same
+protocol (plus show/hide commands) so the plumbing can be exercised on Linux.
+"""
+
+import sys
+import time
+import select
+import threading
+import subprocess
+import config
+
+
+JXA_WORKER = r'''
+ObjC.import('Foundation');
+function run() {
+    var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    var events = Application('System Events');
+    var buffer = '';
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length === 0) { break; }
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        var newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            var parts = buffer.slice(0, newline).split('\t');
+            buffer = buffer.slice(newline + 1);
+            var answer;
+            try {
+                if (parts[0] === 'visible') {
+                    answer = events.processes[parts[1]].windows[parts[2]].exists() ? '1' : '0';
+                } else if (parts[0] === 'ping') {
+                    answer = 'pong';
+                } else {
+                    answer = 'E unknown command';
+                }
+            } catch (e) {
+                answer = '0';
+            }
+            stdout.writeData($(answer + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+        }
+    }
+}
+'''
+
+STANDIN_WORKER = r'''
+import sys
+visible = set()
+for line in sys.stdin:
+    parts = line.rstrip("\n").split("\t")
+    if parts[0] == "visible":
+        answer = "1" if tuple(parts[1:3]) in visible else "0"
+    elif parts[0] == "show":
+        visible.add(tuple(parts[1:3])); answer = "ok"
+    elif parts[0] == "hide":
+        visible.discard(tuple(parts[1:3])); answer = "ok"
+    elif parts[0] == "ping":
+        answer = "pong"
+    else:
+        answer = "E unknown command"
+    sys.stdout.write(answer + "\n")
+    sys.stdout.flush()
+'''
+
+BACKEND_COMMANDS = {
+    "jxa": ["osascript", "-l", "JavaScript", "-e", JXA_WORKER],
+    "standin": [sys.executable, "-u", "-c", STANDIN_WORKER],
+}
+
+
+class UIDetectorError(Exception):
+    """Raised when the detector worker is unavailable or misbehaves"""
+
+
+class UIDetector:
+    def __init__(self, backend=None, query_timeout=None):
+        self.backend = backend or config.UI_DETECTOR_BACKEND
+        self.query_timeout = query_timeout or config.UI_DETECTOR_QUERY_TIMEOUT
+        self._process = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.total_query_time = 0.0
+        self.last_query_time = None
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        command = BACKEND_COMMANDS.get(self.backend)
+        if command is None:
+            raise UIDetectorError(f"No UI detector backend available ({self.backend})")
+        self._process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, bufsize=1
+        )
+        print(f"🛰️  Started {self.backend} UI detector worker (pid {self._process.pid})")
+
+    def _request(self, *fields):
+        with self._lock:
+            self._ensure_started()
+            start_time = time.perf_counter()
+            try:
+                self._process.stdin.write("\t".join(fields) + "\n")
+                self._process.stdin.flush()
+                ready, _, _ = select.select([self._process.stdout], [], [], self.query_timeout)
+                if not ready:
+                    raise UIDetectorError(f"UI detector did not answer within {self.query_timeout}s")
+                answer = self._process.stdout.readline().strip()
+            except (OSError, UIDetectorError):
+                # A wedged or dead worker is replaced on the next query
+                self.stop()
+                raise
+
+            elapsed = time.perf_counter() - start_time
+            self.queries += 1
+            self.total_query_time += elapsed
+            self.last_query_time = elapsed
+
+        if not answer or answer.startswith("E"):
+            raise UIDetectorError(f"UI detector error: {answer or 'no response'}")
+        return answer
+
+    def is_visible(self, process_name, window_name):
+        """Return True if the given window of the given application process exists"""
+        return self._request("visible", process_name, window_name) == "1"
+
+    def set_visible(self, process_name, window_name, visible):
+        """Stand-in backend only: mark an element as visible or hidden"""
+        self._request("show" if visible else "hide", process_name, window_name)
+
+    def stop(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process = None
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "queries": self.queries,
+            "avg_query_ms": self.total_query_time / self.queries * 1000 if self.queries else None,
+            "last_query_ms": self.last_query_time * 1000 if self.last_query_time is not None else None
+        }
+
+
+# Global instance for reuse
+ui_detector = UIDetector()
+
+
+if __name__ == "__main__":
+    # Per-query cost of the persistent worker vs spawning a process per check
+    detector = UIDetector(backend=sys.argv[1] if len(sys.argv) > 1 else config.UI_DETECTOR_BACKEND)
+    detector.is_visible("Spotlight", "Spotlight")  # Warm-up (process start)
+    for _ in range(50):
+        detector.is_visible("Spotlight", "Spotlight")
+    print(f"🛰️  {detector.backend} worker: {detector.stats()['avg_query_ms']:.3f} ms/query")
+
+    command = BACKEND_COMMANDS[detector.backend]
+    start_time = time.perf_counter()
+    for _ in range(5):
+        subprocess.run(command, input="visible\tSpotlight\tSpotlight\n", capture_output=True, text=True)
+    print(f"🐢 spawn per query: {(time.perf_counter() - start_time) / 5 * 1000:.3f} ms/query")
+    detector.stop()
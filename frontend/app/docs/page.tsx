@@ -88,8 +88,12 @@ function DocsContent() {
           } else if (data.type === 'start') {
             console.log('📋 Starting documentation generation...');
           } else if (data.type === 'chunk') {
-            // Use throttled update for smoother streaming
-            throttledUpdate(data.partial_content);
+            // Chunks carry only the new text - append it, then use throttled update for smoother streaming
+            throttledUpdate(streamingContentRef.current + data.text);
+          } else if (data.type === 'checkpoint') {
+            if (streamingContentRef.current.length !== data.length) {
+              console.warn('⚠️ Stream checkpoint mismatch - the complete event will resync the document');
+            }
           } else if (data.type === 'complete') {
             console.log('✅ Documentation generation complete');
             // Final update with complete content